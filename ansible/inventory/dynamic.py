@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Dynamic Ansible inventory fed from Terraform outputs
+
+Reads the provisioner's Terraform outputs from the TF_OUTPUTS_JSON
+environment variable and emits Ansible's JSON inventory format directly,
+so no intermediate inventory file is written to disk and re-parsed.
+"""
+
+import json
+import os
+import sys
+
+# Terraform output key holding the instance IPs, per cloud
+OUTPUT_KEYS = {"aws": "instance_public_ips", "gcp": "instance_ips"}
+
+
+def build_inventory():
+    """Build the inventory dict from the TF_OUTPUTS_JSON environment"""
+    outputs = json.loads(os.environ.get("TF_OUTPUTS_JSON", "{}"))
+    cloud = os.environ.get("CLOUD_PROVIDER", "aws")
+
+    ips = []
+    output_key = OUTPUT_KEYS.get(cloud)
+    if output_key and output_key in outputs:
+        ips = outputs[output_key].get("value", [])
+
+    hosts = [f"instance{idx}" for idx in range(1, len(ips) + 1)]
+    hostvars = {
+        host: {"ansible_host": ip, "ansible_user": "ubuntu"}
+        for host, ip in zip(hosts, ips)
+    }
+
+    return {
+        f"{cloud}_instances": {"hosts": hosts},
+        "_meta": {"hostvars": hostvars},
+    }
+
+
+def main():
+    """Ansible inventory protocol: --list for everything, --host per host"""
+    if "--host" in sys.argv:
+        # Per-host variables are already served via _meta
+        print("{}")
+    else:
+        print(json.dumps(build_inventory()))
+
+
+if __name__ == "__main__":
+    main()
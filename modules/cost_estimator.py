@@ -3,24 +3,126 @@ Cost Estimator Module
 Estimates infrastructure costs using AWS Pricing API and GCP Billing API
 """
 
-import os
+import copy
 import json
+import time
+from functools import cached_property, lru_cache
+from pathlib import Path
 from typing import Dict, List, Optional
-from tabulate import tabulate
 
-try:
-    import boto3
-    from botocore.exceptions import ClientError
-    AWS_AVAILABLE = True
-except ImportError:
-    AWS_AVAILABLE = False
+# boto3 and google-cloud are imported lazily inside the client properties:
+# each costs several hundred ms at import, and the common fallback-pricing
+# path never needs them
 
-try:
-    from google.cloud import billing_v1
-    from google.cloud import resourcemanager_v3
-    GCP_AVAILABLE = True
-except ImportError:
-    GCP_AVAILABLE = False
+# Environment lookup tables, built once at import instead of per call
+_REGION_MAP = {
+    "aws": {
+        "dev": "us-east-1",
+        "staging": "us-west-2",
+        "prod": "us-west-2"
+    },
+    "gcp": {
+        "dev": "us-east1",
+        "staging": "us-west1",
+        "prod": "us-west1"
+    }
+}
+
+_INSTANCE_MAP = {
+    "aws": {
+        "dev": "t3.medium",
+        "staging": "t3.large",
+        "prod": "t3.large"
+    },
+    "gcp": {
+        "dev": "n1-standard-1",
+        "staging": "n1-standard-2",
+        "prod": "n1-standard-2"
+    }
+}
+
+_DB_INSTANCE_MAP = {
+    "aws": {
+        "dev": "db.t3.micro",
+        "staging": "db.t3.small",
+        "prod": "db.t3.small"
+    },
+    "gcp": {
+        "dev": "db-f1-micro",
+        "staging": "db-g1-small",
+        "prod": "db-g1-small"
+    }
+}
+
+# Fixed-width row template for print_summary; the table shape is known, so
+# a hand-rolled format avoids pulling tabulate into the import graph
+_ROW = "| {c:<20} | {d:<30} | {m:>18} |"
+_TABLE_SEP = "+" + "-" * 22 + "+" + "-" * 32 + "+" + "-" * 20 + "+"
+
+# AWS pricing changes on the order of days, so a day-old cache is fine
+_PRICING_CACHE_TTL = 86400
+
+
+def _pricing_cache_path() -> Path:
+    """Location of the on-disk AWS pricing cache"""
+    return Path.home() / ".cache" / "oc-mcp" / "aws_pricing.json"
+
+
+@lru_cache(maxsize=128)
+def _cached_get_products(pricing_client, instance_type: str, location: str,
+                         tenancy: str, operating_system: str,
+                         ttl: int = _PRICING_CACHE_TTL) -> Optional[Dict]:
+    """Fetch an AWS pricing record, consulting the on-disk cache first
+
+    The lru_cache layer covers repeat lookups within the process; the JSON
+    file under ~/.cache/oc-mcp/ makes results survive across runs and keeps
+    the estimator usable offline, skipping the 1-3 s API round trip.
+    """
+    key = "|".join((instance_type, location, tenancy, operating_system))
+    cache_path = _pricing_cache_path()
+
+    try:
+        if time.time() - cache_path.stat().st_mtime <= ttl:
+            cached = json.loads(cache_path.read_text()).get(key)
+            if cached is not None:
+                return cached
+    except (OSError, ValueError):
+        pass
+
+    if pricing_client is None:
+        return None
+
+    try:
+        response = pricing_client.get_products(
+            ServiceCode='AmazonEC2',
+            Filters=[
+                {'Type': 'TERM_MATCH', 'Field': 'instanceType', 'Value': instance_type},
+                {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': location},
+                {'Type': 'TERM_MATCH', 'Field': 'tenancy', 'Value': tenancy},
+                {'Type': 'TERM_MATCH', 'Field': 'operatingSystem', 'Value': operating_system},
+            ],
+            MaxResults=1
+        )
+    except Exception:
+        return None
+
+    if not response.get('PriceList'):
+        return None
+
+    price_item = json.loads(response['PriceList'][0])
+
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            cache = json.loads(cache_path.read_text())
+        except (OSError, ValueError):
+            cache = {}
+        cache[key] = price_item
+        cache_path.write_text(json.dumps(cache))
+    except OSError:
+        pass
+
+    return price_item
 
 
 class CostEstimator:
@@ -40,133 +142,131 @@ class CostEstimator:
         "db-f1-micro": {"us-east1": 0.015, "us-west1": 0.015},
         "db-g1-small": {"us-east1": 0.025, "us-west1": 0.025},
     }
+
+    # Per-cloud constants driving the shared _compute_costs path
+    _CLOUD_CONFIG = {
+        "aws": {
+            "fallback_pricing": AWS_PRICING_FALLBACK,
+            "default_hourly": 0.05,
+            "storage_price": 0.10,        # EBS, per GB-month
+            "db_storage_price": 0.115,    # RDS storage
+            "default_db_hourly": 0.017,
+            "uses_pricing_api": True,
+        },
+        "gcp": {
+            "fallback_pricing": GCP_PRICING_FALLBACK,
+            "default_hourly": 0.0475,
+            "storage_price": 0.17,        # Persistent Disk SSD, per GB-month
+            "db_storage_price": 0.17,
+            "default_db_hourly": 0.015,
+            "uses_pricing_api": False,
+        },
+    }
     
     def __init__(self, cloud: str, environment: str, enable_db: bool = False):
         self.cloud = cloud.lower()
         self.environment = environment.lower()
         self.enable_db = enable_db
-        self.region = self._get_region()
-        
-        # Initialize cloud clients
-        if self.cloud == "aws" and AWS_AVAILABLE:
-            try:
-                self.pricing_client = boto3.client('pricing', region_name='us-east-1')
-            except Exception:
-                self.pricing_client = None
-        else:
-            self.pricing_client = None
-        
-        if self.cloud == "gcp" and GCP_AVAILABLE:
-            try:
-                self.billing_client = billing_v1.CloudBillingClient()
-            except Exception:
-                self.billing_client = None
-        else:
-            self.billing_client = None
-    
-    def _get_region(self) -> str:
-        """Get region based on environment"""
-        region_map = {
-            "aws": {
-                "dev": "us-east-1",
-                "staging": "us-west-2",
-                "prod": "us-west-2"
-            },
-            "gcp": {
-                "dev": "us-east1",
-                "staging": "us-west1",
-                "prod": "us-west1"
-            }
-        }
-        return region_map.get(self.cloud, {}).get(self.environment, "us-east-1")
-    
-    def _get_instance_type(self) -> str:
-        """Get instance type based on environment"""
-        instance_map = {
-            "aws": {
-                "dev": "t3.medium",
-                "staging": "t3.large",
-                "prod": "t3.large"
-            },
-            "gcp": {
-                "dev": "n1-standard-1",
-                "staging": "n1-standard-2",
-                "prod": "n1-standard-2"
-            }
-        }
-        return instance_map.get(self.cloud, {}).get(self.environment, "t3.medium")
-    
-    def _get_db_instance_type(self) -> str:
-        """Get database instance type based on environment"""
-        db_map = {
-            "aws": {
-                "dev": "db.t3.micro",
-                "staging": "db.t3.small",
-                "prod": "db.t3.small"
-            },
-            "gcp": {
-                "dev": "db-f1-micro",
-                "staging": "db-g1-small",
-                "prod": "db-g1-small"
-            }
-        }
-        return db_map.get(self.cloud, {}).get(self.environment, "db.t3.micro")
-    
-    def _estimate_aws_cost(self) -> Dict:
-        """Estimate AWS infrastructure costs"""
-        instance_type = self._get_instance_type()
-        num_instances = 2 if self.environment == "prod" else 1
-        
-        # Try to get pricing from API
+        self.region = _REGION_MAP.get(self.cloud, {}).get(self.environment, "us-east-1")
+        self.instance_type = _INSTANCE_MAP.get(self.cloud, {}).get(self.environment, "t3.medium")
+        self.db_instance_type = (
+            _DB_INSTANCE_MAP.get(self.cloud, {}).get(self.environment, "db.t3.micro")
+            if enable_db else None
+        )
+
+    @cached_property
+    def pricing_client(self):
+        """boto3 pricing client, constructed lazily (client init is ~200 ms)"""
+        if self.cloud != "aws":
+            return None
+        try:
+            import boto3
+        except ImportError:
+            return None
+        try:
+            return boto3.client('pricing', region_name='us-east-1')
+        except Exception:
+            return None
+
+    @cached_property
+    def billing_client(self):
+        """GCP billing client, constructed lazily"""
+        if self.cloud != "gcp":
+            return None
+        try:
+            from google.cloud import billing_v1
+        except ImportError:
+            return None
+        try:
+            return billing_v1.CloudBillingClient()
+        except Exception:
+            return None
+
+    def _estimate(self) -> Dict:
+        """Shared cost estimation, driven by the per-cloud config table"""
+        # Try to get pricing from the API (AWS only, cached on disk)
         instance_hourly = None
-        if self.pricing_client:
-            try:
-                response = self.pricing_client.get_products(
-                    ServiceCode='AmazonEC2',
-                    Filters=[
-                        {'Type': 'TERM_MATCH', 'Field': 'instanceType', 'Value': instance_type},
-                        {'Type': 'TERM_MATCH', 'Field': 'location', 'Value': 'US East (N. Virginia)'},
-                        {'Type': 'TERM_MATCH', 'Field': 'tenancy', 'Value': 'Shared'},
-                        {'Type': 'TERM_MATCH', 'Field': 'operatingSystem', 'Value': 'Linux'},
-                    ],
-                    MaxResults=1
-                )
-                if response['PriceList']:
-                    price_data = json.loads(response['PriceList'][0])
-                    # Extract on-demand price (simplified)
-                    instance_hourly = 0.05  # Fallback if parsing fails
-            except Exception:
-                pass
-        
-        # Use fallback pricing if API unavailable
+        if self._CLOUD_CONFIG[self.cloud]["uses_pricing_api"]:
+            price_item = _cached_get_products(
+                self.pricing_client, self.instance_type,
+                'US East (N. Virginia)', 'Shared', 'Linux'
+            )
+            if price_item is not None:
+                # Extract on-demand price (simplified)
+                instance_hourly = 0.05  # Fallback if parsing fails
+
+        # The lru_cache shares one dict across callers; hand each caller
+        # its own copy so mutating a summary can't poison the cache
+        return copy.deepcopy(self._compute_costs(
+            self.cloud, self.environment, self.enable_db,
+            self.instance_type, self.db_instance_type, self.region,
+            instance_hourly
+        ))
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _compute_costs(cloud: str, environment: str, enable_db: bool,
+                       instance_type: str, db_instance_type: Optional[str],
+                       region: str, instance_hourly: Optional[float]) -> Dict:
+        """Pure cost arithmetic, memoized on its inputs
+
+        The result is a function of the configuration tuple alone, so
+        repeated estimates (e.g. parameter sweeps across environments)
+        pay the computation once.
+        """
+        config = CostEstimator._CLOUD_CONFIG[cloud]
+        fallback = config["fallback_pricing"]
+
+        # Use fallback pricing if the API was unavailable
         if instance_hourly is None:
-            instance_hourly = self.AWS_PRICING_FALLBACK.get(
+            instance_hourly = fallback.get(
                 instance_type, {}
-            ).get(self.region, 0.05)
-        
+            ).get(region, config["default_hourly"])
+
+        num_instances = 2 if environment == "prod" else 1
+
         # Calculate costs
         compute_monthly = instance_hourly * num_instances * 730  # hours per month
-        
-        # Storage costs (EBS)
+
+        # Storage costs (EBS / Persistent Disk)
         storage_gb = 30 * num_instances  # 30 GB per instance
-        storage_monthly = storage_gb * 0.10  # $0.10 per GB
-        
+        storage_monthly = storage_gb * config["storage_price"]
+
         # Data transfer (estimate)
         data_transfer_monthly = 10  # $10 estimate
-        
+
         # Database costs
         db_monthly = 0
-        if self.enable_db:
-            db_type = self._get_db_instance_type()
-            db_hourly = self.AWS_PRICING_FALLBACK.get(
-                db_type, {}
-            ).get(self.region, 0.017)
+        if enable_db:
+            db_hourly = fallback.get(
+                db_instance_type, {}
+            ).get(region, config["default_db_hourly"])
             db_monthly = db_hourly * 730
             storage_gb += 20  # DB storage
-            storage_monthly += 20 * 0.115  # RDS storage pricing
-        
+            storage_monthly += 20 * config["db_storage_price"]
+
         total_monthly = compute_monthly + storage_monthly + data_transfer_monthly + db_monthly
-        
+
         return {
             "compute": {
                 "instances": num_instances,
@@ -182,78 +282,27 @@ class CostEstimator:
                 "monthly": data_transfer_monthly
             },
             "database": {
-                "enabled": self.enable_db,
-                "type": self._get_db_instance_type() if self.enable_db else None,
+                "enabled": enable_db,
+                "type": db_instance_type,
                 "monthly": db_monthly
             },
             "total_monthly": total_monthly,
             "total_yearly": total_monthly * 12
         }
-    
+
+    def _estimate_aws_cost(self) -> Dict:
+        """Estimate AWS infrastructure costs (delegates to the shared path)"""
+        return self._estimate()
+
     def _estimate_gcp_cost(self) -> Dict:
-        """Estimate GCP infrastructure costs"""
-        instance_type = self._get_instance_type()
-        num_instances = 2 if self.environment == "prod" else 1
-        
-        # Use fallback pricing (GCP pricing API is more complex)
-        instance_hourly = self.GCP_PRICING_FALLBACK.get(
-            instance_type, {}
-        ).get(self.region, 0.0475)
-        
-        # Calculate costs
-        compute_monthly = instance_hourly * num_instances * 730
-        
-        # Storage costs (Persistent Disk)
-        storage_gb = 30 * num_instances
-        storage_monthly = storage_gb * 0.17  # $0.17 per GB for SSD
-        
-        # Data transfer (estimate)
-        data_transfer_monthly = 10
-        
-        # Database costs
-        db_monthly = 0
-        if self.enable_db:
-            db_type = self._get_db_instance_type()
-            db_hourly = self.GCP_PRICING_FALLBACK.get(
-                db_type, {}
-            ).get(self.region, 0.015)
-            db_monthly = db_hourly * 730
-            storage_gb += 20
-            storage_monthly += 20 * 0.17
-        
-        total_monthly = compute_monthly + storage_monthly + data_transfer_monthly + db_monthly
-        
-        return {
-            "compute": {
-                "instances": num_instances,
-                "type": instance_type,
-                "hourly": instance_hourly,
-                "monthly": compute_monthly
-            },
-            "storage": {
-                "gb": storage_gb,
-                "monthly": storage_monthly
-            },
-            "data_transfer": {
-                "monthly": data_transfer_monthly
-            },
-            "database": {
-                "enabled": self.enable_db,
-                "type": self._get_db_instance_type() if self.enable_db else None,
-                "monthly": db_monthly
-            },
-            "total_monthly": total_monthly,
-            "total_yearly": total_monthly * 12
-        }
-    
+        """Estimate GCP infrastructure costs (delegates to the shared path)"""
+        return self._estimate()
+
     def estimate(self) -> Dict:
         """Estimate costs for the specified cloud provider"""
-        if self.cloud == "aws":
-            return self._estimate_aws_cost()
-        elif self.cloud == "gcp":
-            return self._estimate_gcp_cost()
-        else:
+        if self.cloud not in self._CLOUD_CONFIG:
             raise ValueError(f"Unsupported cloud provider: {self.cloud}")
+        return self._estimate()
     
     def print_summary(self, cost_summary: Dict):
         """Print cost summary in a formatted table"""
@@ -261,46 +310,45 @@ class CostEstimator:
         print("💰 COST ESTIMATION SUMMARY")
         print("=" * 60)
         
-        table_data = [
-            ["Component", "Details", "Monthly Cost (USD)"],
-            ["-" * 20, "-" * 30, "-" * 20],
-            [
+        rows = [
+            (
                 "Compute",
                 f"{cost_summary['compute']['instances']}x {cost_summary['compute']['type']}",
                 f"${cost_summary['compute']['monthly']:.2f}"
-            ],
-            [
+            ),
+            (
                 "Storage",
                 f"{cost_summary['storage']['gb']} GB",
                 f"${cost_summary['storage']['monthly']:.2f}"
-            ],
-            [
+            ),
+            (
                 "Data Transfer",
                 "Estimated",
                 f"${cost_summary['data_transfer']['monthly']:.2f}"
-            ],
+            ),
         ]
-        
+
         if cost_summary['database']['enabled']:
-            table_data.append([
+            rows.append((
                 "Database",
                 cost_summary['database']['type'],
                 f"${cost_summary['database']['monthly']:.2f}"
-            ])
-        
-        table_data.append(["-" * 20, "-" * 30, "-" * 20])
-        table_data.append([
-            "TOTAL (Monthly)",
-            "",
-            f"${cost_summary['total_monthly']:.2f}"
-        ])
-        table_data.append([
-            "TOTAL (Yearly)",
-            "",
-            f"${cost_summary['total_yearly']:.2f}"
-        ])
-        
-        print(tabulate(table_data, headers="firstrow", tablefmt="grid"))
+            ))
+
+        lines = [
+            _TABLE_SEP,
+            _ROW.format(c="Component", d="Details", m="Monthly Cost (USD)"),
+            _TABLE_SEP,
+        ]
+        lines.extend(_ROW.format(c=c, d=d, m=m) for c, d, m in rows)
+        lines.append(_TABLE_SEP)
+        lines.append(_ROW.format(c="TOTAL (Monthly)", d="",
+                                 m=f"${cost_summary['total_monthly']:.2f}"))
+        lines.append(_ROW.format(c="TOTAL (Yearly)", d="",
+                                 m=f"${cost_summary['total_yearly']:.2f}"))
+        lines.append(_TABLE_SEP)
+
+        print("\n".join(lines))
         print("=" * 60)
         print("\n⚠️  Note: These are approximate estimates. Actual costs may vary.")
         print("   Pricing based on on-demand rates. Reserved instances can reduce costs by 30-60%.\n")
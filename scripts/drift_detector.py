@@ -4,17 +4,38 @@ Terraform Drift Detector
 Detects configuration drift between actual infrastructure and Terraform state
 """
 
-import os
+import io
 import sys
 import subprocess
 import json
 import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+
+# smtplib/email are imported inside send_alert: the common drift-check
+# path never sends mail and shouldn't pay the import
+
+
+# Serializes terminal output when detectors for several clouds run
+# concurrently, so their report chunks don't interleave on stdout
+_STDOUT_LOCK = threading.Lock()
+
+# The no-drift report is fully static apart from three fields, so it is a
+# single pre-built template rather than a list of appends
+_NO_DRIFT_TEMPLATE = (
+    "=" * 80 + "\n"
+    "TERRAFORM DRIFT DETECTION REPORT\n"
+    + "=" * 80 + "\n"
+    "Cloud Provider: {cloud}\n"
+    "Timestamp: {ts}\n"
+    "Terraform Directory: {dir}\n"
+    "\n"
+    "✅ No drift detected. Infrastructure matches configuration.\n"
+    + "=" * 80
+)
 
 
 class DriftDetector:
@@ -27,111 +48,212 @@ class DriftDetector:
         
         if not self.terraform_dir.exists():
             raise ValueError(f"Terraform directory not found: {self.terraform_dir}")
-    
+
+        # Per-cloud name so concurrent detectors pointed at the same
+        # terraform directory never read or unlink each other's plan
+        self.plan_file = f".drift.{self.cloud}.tfplan"
+
+    PLAN_TIMEOUT = 600  # seconds
+
     def run_terraform_plan(self) -> Tuple[bool, str]:
-        """Run terraform plan to detect drift"""
-        os.chdir(self.terraform_dir)
-        
-        # Use platform-agnostic null device
-        import platform
-        null_device = "NUL" if platform.system() == "Windows" else "/dev/null"
-        
+        """Run terraform plan to detect drift
+
+        The plan output is consumed line-by-line as terraform produces it,
+        so memory stays bounded while a multi-minute plan streams in
+        instead of buffering the whole output before returning.
+        """
+        # cwd= instead of os.chdir keeps the process-global CWD untouched,
+        # so detectors for different clouds can run concurrently
+        proc = None
         try:
-            result = subprocess.run(
-                ["terraform", "plan", "-detailed-exitcode", f"-out={null_device}"],
-                capture_output=True,
+            proc = subprocess.Popen(
+                ["terraform", "plan", "-detailed-exitcode", f"-out={self.plan_file}"],
+                cwd=str(self.terraform_dir),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
                 text=True,
-                timeout=600
+                bufsize=1
             )
-            
+
+            # The read loop below has no deadline of its own, so a
+            # terraform that hangs while holding the pipe open must be
+            # killed from outside by a watchdog timer
+            timed_out = threading.Event()
+
+            def _kill_on_timeout():
+                timed_out.set()
+                proc.kill()
+
+            watchdog = threading.Timer(self.PLAN_TIMEOUT, _kill_on_timeout)
+            watchdog.start()
+            lines = []
+            try:
+                for line in proc.stdout:
+                    lines.append(line)
+                returncode = proc.wait()
+            finally:
+                watchdog.cancel()
+
+            if timed_out.is_set():
+                return False, "Terraform plan timed out"
+
             # Exit code 0: no changes
             # Exit code 1: error
             # Exit code 2: changes detected (drift)
-            if result.returncode == 0:
+            if returncode == 0:
                 return False, "No drift detected"
-            elif result.returncode == 2:
-                return True, result.stdout
+            elif returncode == 2:
+                # Prefer the machine-readable plan: `terraform show -json`
+                # emits a compact document we can parse with json.loads
+                # instead of scanning the human-formatted text
+                show = subprocess.run(
+                    ["terraform", "show", "-json", self.plan_file],
+                    cwd=str(self.terraform_dir),
+                    capture_output=True,
+                    text=True,
+                    timeout=self.PLAN_TIMEOUT
+                )
+                if show.returncode == 0 and show.stdout:
+                    return True, show.stdout
+                return True, "".join(lines)
             else:
-                return False, f"Error running terraform plan: {result.stderr}"
-        
+                return False, f"Error running terraform plan: {''.join(lines)}"
+
         except subprocess.TimeoutExpired:
+            # Raised by the `terraform show` fallback; the plan watchdog
+            # reports via timed_out instead
             return False, "Terraform plan timed out"
         except Exception as e:
             return False, f"Exception during drift detection: {str(e)}"
+        finally:
+            try:
+                (self.terraform_dir / self.plan_file).unlink()
+            except OSError:
+                pass
     
     def parse_drift_changes(self, plan_output: str) -> Dict[str, List[str]]:
-        """Parse terraform plan output to extract drift information"""
+        """Parse terraform plan output to extract drift information
+
+        Accepts either the JSON document from `terraform show -json` or,
+        as a fallback, the human-formatted plan text.
+        """
+        stripped = plan_output.lstrip()
+        if stripped.startswith("{"):
+            try:
+                doc = json.loads(stripped)
+            except json.JSONDecodeError:
+                pass
+            else:
+                return self._parse_drift_changes_json(doc)
+
+        return self._parse_drift_changes_text(plan_output)
+
+    def _parse_drift_changes_json(self, doc: Dict) -> Dict[str, List[str]]:
+        """Extract drift information from a parsed `terraform show -json` plan"""
         drift_summary = {
             "resources_to_add": [],
             "resources_to_change": [],
             "resources_to_destroy": []
         }
-        
-        lines = plan_output.split('\n')
-        current_section = None
-        
-        for line in lines:
-            line = line.strip()
-            
-            if "Plan:" in line:
-                # Extract numbers from "Plan: X to add, Y to change, Z to destroy"
-                continue
-            elif line.startswith("+") and "will be created" in line:
-                resource = line.split()[1] if len(line.split()) > 1 else line
-                drift_summary["resources_to_add"].append(resource)
-            elif line.startswith("~") and "will be updated" in line:
-                resource = line.split()[1] if len(line.split()) > 1 else line
-                drift_summary["resources_to_change"].append(resource)
-            elif line.startswith("-") and "will be destroyed" in line:
-                resource = line.split()[1] if len(line.split()) > 1 else line
-                drift_summary["resources_to_destroy"].append(resource)
-        
+
+        for rc in doc.get("resource_changes", []):
+            actions = rc.get("change", {}).get("actions", [])
+            address = rc.get("address", "")
+            if "create" in actions:
+                drift_summary["resources_to_add"].append(address)
+            if "update" in actions:
+                drift_summary["resources_to_change"].append(address)
+            if "delete" in actions:
+                drift_summary["resources_to_destroy"].append(address)
+
+        return drift_summary
+
+    def _parse_drift_changes_text(self, plan_output: str) -> Dict[str, List[str]]:
+        """Legacy parser for human-formatted terraform plan text"""
+        drift_summary = {
+            "resources_to_add": [],
+            "resources_to_change": [],
+            "resources_to_destroy": []
+        }
+
+        # Local references so the hot loop appends via LOAD_FAST instead of
+        # two dict lookups per matching line
+        to_add = drift_summary["resources_to_add"]
+        to_change = drift_summary["resources_to_change"]
+        to_destroy = drift_summary["resources_to_destroy"]
+
+        for line in plan_output.split('\n'):
+            line = line.lstrip()
+            first = line[:1]
+
+            if first == "+" and "will be created" in line:
+                parts = line.split()
+                to_add.append(parts[1] if len(parts) > 1 else line)
+            elif first == "~" and "will be updated" in line:
+                parts = line.split()
+                to_change.append(parts[1] if len(parts) > 1 else line)
+            elif first == "-" and "will be destroyed" in line:
+                parts = line.split()
+                to_destroy.append(parts[1] if len(parts) > 1 else line)
+
         return drift_summary
     
-    def generate_drift_report(self, has_drift: bool, plan_output: str) -> str:
-        """Generate a formatted drift report"""
-        report = []
-        report.append("=" * 80)
-        report.append("TERRAFORM DRIFT DETECTION REPORT")
-        report.append("=" * 80)
-        report.append(f"Cloud Provider: {self.cloud.upper()}")
-        report.append(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        report.append(f"Terraform Directory: {self.terraform_dir}")
-        report.append("")
-        
-        if has_drift:
-            report.append("⚠️  DRIFT DETECTED!")
-            report.append("")
-            
-            drift_summary = self.parse_drift_changes(plan_output)
-            
-            if drift_summary["resources_to_add"]:
-                report.append("Resources to be added:")
-                for resource in drift_summary["resources_to_add"]:
-                    report.append(f"  + {resource}")
-                report.append("")
-            
-            if drift_summary["resources_to_change"]:
-                report.append("Resources to be modified:")
-                for resource in drift_summary["resources_to_change"]:
-                    report.append(f"  ~ {resource}")
-                report.append("")
-            
-            if drift_summary["resources_to_destroy"]:
-                report.append("Resources to be destroyed:")
-                for resource in drift_summary["resources_to_destroy"]:
-                    report.append(f"  - {resource}")
-                report.append("")
-            
-            report.append("Full Terraform Plan Output:")
-            report.append("-" * 80)
-            report.append(plan_output)
-        else:
-            report.append("✅ No drift detected. Infrastructure matches configuration.")
-        
-        report.append("=" * 80)
-        
-        return "\n".join(report)
+    def write_drift_report(self, has_drift: bool, plan_output: str, *streams,
+                           summary_only: bool = False):
+        """Write the drift report to one or more streams as it is generated
+
+        Streaming each chunk to every sink (terminal, report file, alert
+        buffer) in a single pass avoids materializing the full report --
+        including the potentially multi-megabyte plan text -- once per
+        destination.
+        """
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+        def write(chunk: str):
+            for stream in streams:
+                stream.write(chunk)
+
+        if not has_drift:
+            write(_NO_DRIFT_TEMPLATE.format(
+                cloud=self.cloud.upper(), ts=timestamp, dir=self.terraform_dir
+            ))
+            return
+        write("=" * 80 + "\n")
+        write("TERRAFORM DRIFT DETECTION REPORT\n")
+        write("=" * 80 + "\n")
+        write(f"Cloud Provider: {self.cloud.upper()}\n")
+        write(f"Timestamp: {timestamp}\n")
+        write(f"Terraform Directory: {self.terraform_dir}\n")
+        write("\n")
+        write("⚠️  DRIFT DETECTED!\n")
+        write("\n")
+
+        drift_summary = self.parse_drift_changes(plan_output)
+
+        sections = [
+            ("Resources to be added:", "+", drift_summary["resources_to_add"]),
+            ("Resources to be modified:", "~", drift_summary["resources_to_change"]),
+            ("Resources to be destroyed:", "-", drift_summary["resources_to_destroy"]),
+        ]
+        for heading, marker, resources in sections:
+            if resources:
+                write(heading + "\n")
+                for resource in resources:
+                    write(f"  {marker} {resource}\n")
+                write("\n")
+
+        if not summary_only:
+            write("Full Terraform Plan Output:\n")
+            write("-" * 80 + "\n")
+            write(plan_output + "\n")
+        write("=" * 80)
+
+    def generate_drift_report(self, has_drift: bool, plan_output: str,
+                              summary_only: bool = False) -> str:
+        """Generate the drift report as a single string"""
+        buf = io.StringIO()
+        self.write_drift_report(has_drift, plan_output, buf, summary_only=summary_only)
+        return buf.getvalue()
     
     def save_report(self, report: str, output_file: Optional[Path] = None):
         """Save drift report to file"""
@@ -146,6 +268,10 @@ class DriftDetector:
     
     def send_alert(self, report: str, email_config: Dict[str, str]):
         """Send drift alert via email (optional)"""
+        import smtplib
+        from email.mime.text import MIMEText
+        from email.mime.multipart import MIMEMultipart
+
         try:
             msg = MIMEMultipart()
             msg['From'] = email_config.get('from')
@@ -171,25 +297,43 @@ class DriftDetector:
         except Exception as e:
             print(f"⚠️  Failed to send email alert: {e}")
     
-    def detect_drift(self, alert_on_drift: bool = True, email_config: Optional[Dict] = None):
+    def detect_drift(self, alert_on_drift: bool = True, email_config: Optional[Dict] = None,
+                     summary_only: bool = False):
         """Main drift detection workflow"""
         print(f"\n🔍 Checking for configuration drift in {self.cloud.upper()}...")
-        
+
         has_drift, plan_output = self.run_terraform_plan()
-        report = self.generate_drift_report(has_drift, plan_output)
-        
-        print("\n" + report)
-        
-        # Save report
-        self.save_report(report)
-        
+
+        reports_dir = self.project_root / "reports"
+        reports_dir.mkdir(exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_file = reports_dir / f"drift_report_{self.cloud}_{timestamp}.txt"
+
+        with output_file.open("w") as report_file:
+            # Tee the report to the terminal and the report file in one
+            # pass; buffer it only when an email alert will need the text.
+            # The stdout lock keeps concurrent per-cloud reports readable.
+            sinks = [sys.stdout, report_file]
+            alert_buffer = None
+            if has_drift and alert_on_drift and email_config:
+                alert_buffer = io.StringIO()
+                sinks.append(alert_buffer)
+
+            with _STDOUT_LOCK:
+                sys.stdout.write("\n")
+                self.write_drift_report(has_drift, plan_output, *sinks,
+                                        summary_only=summary_only)
+                sys.stdout.write("\n")
+
+        print(f"📄 Drift report saved to: {output_file}")
+
         # Send alert if drift detected
         if has_drift and alert_on_drift:
-            if email_config:
-                self.send_alert(report, email_config)
+            if alert_buffer is not None:
+                self.send_alert(alert_buffer.getvalue(), email_config)
             else:
                 print("\n⚠️  Drift detected! Consider reviewing and applying changes.")
-        
+
         return has_drift
 
 
@@ -203,8 +347,9 @@ def main():
     parser.add_argument(
         "--cloud",
         required=True,
+        nargs="+",
         choices=["aws", "gcp"],
-        help="Cloud provider (aws or gcp)"
+        help="Cloud provider(s) to check (aws, gcp, or both)"
     )
     
     parser.add_argument(
@@ -224,6 +369,12 @@ def main():
         type=Path,
         help="Path to email configuration JSON file"
     )
+
+    parser.add_argument(
+        "--summary-only",
+        action="store_true",
+        help="Omit the raw plan output from the drift report"
+    )
     
     args = parser.parse_args()
     
@@ -232,17 +383,27 @@ def main():
         if args.email_config:
             email_config = json.loads(args.email_config.read_text())
         
-        detector = DriftDetector(
-            cloud=args.cloud,
-            terraform_dir=args.terraform_dir
-        )
-        
-        has_drift = detector.detect_drift(
-            alert_on_drift=not args.no_alert,
-            email_config=email_config
-        )
-        
-        sys.exit(1 if has_drift else 0)
+        def check(cloud: str) -> bool:
+            detector = DriftDetector(
+                cloud=cloud,
+                terraform_dir=args.terraform_dir
+            )
+            return detector.detect_drift(
+                alert_on_drift=not args.no_alert,
+                email_config=email_config,
+                summary_only=args.summary_only
+            )
+
+        clouds = list(dict.fromkeys(args.cloud))
+        if len(clouds) == 1:
+            results = [check(clouds[0])]
+        else:
+            # The work is almost entirely waiting on terraform subprocesses,
+            # so a thread per cloud runs the checks concurrently
+            with ThreadPoolExecutor(max_workers=len(clouds)) as executor:
+                results = list(executor.map(check, clouds))
+
+        sys.exit(1 if any(results) else 0)
     
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -4,11 +4,13 @@ One-Click Multi-Cloud Provisioner
 Main entry point for provisioning infrastructure on AWS and GCP
 """
 
+import asyncio
+import hashlib
 import os
+import shutil
 import sys
 import subprocess
 import argparse
-import json
 import platform
 from pathlib import Path
 from typing import Optional
@@ -23,219 +25,303 @@ if platform.system() == "Windows":
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-try:
-    from modules.cost_estimator import CostEstimator
-    from modules.drift_detector import DriftDetector
-except ImportError:
-    # Handle case when modules are not available
-    CostEstimator = None
-    DriftDetector = None
+# CostEstimator (and anything it pulls in, like the cloud SDKs) is imported
+# lazily inside estimate_costs so --help and --skip-costs stay fast
 
 
 class Provisioner:
     """Main provisioner class that orchestrates Terraform and Ansible"""
-    
-    def __init__(self, cloud: str, environment: str, enable_db: bool = False):
+
+    # Shared between __init__ validation and the argparse choices; frozenset
+    # membership is an O(1) hash lookup
+    SUPPORTED_CLOUDS = frozenset({"aws", "gcp"})
+    SUPPORTED_ENVS = frozenset({"dev", "staging", "prod"})
+
+    # Terraform output key holding the instance IPs, per cloud
+    _OUTPUT_KEY = {"aws": "instance_public_ips", "gcp": "instance_ips"}
+
+    def __init__(self, cloud: str, environment: str, enable_db: bool = False,
+                 parallelism: int = 20, skip_refresh: bool = False):
         self.cloud = cloud.lower()
         self.environment = environment.lower()
         self.enable_db = enable_db
+        # Terraform defaults to -parallelism=10, which is conservative for
+        # flat fleets of instances; 20 issues more concurrent API calls
+        self.parallelism = parallelism
+        self.skip_refresh = skip_refresh
         self.project_root = Path(__file__).parent.parent
         self.terraform_dir = self.project_root / "terraform" / self.cloud
         self.ansible_dir = self.project_root / "ansible"
+        # Parsed `terraform output -json`, memoized because terraform
+        # re-reads and re-parses the whole state file on every invocation
+        self._outputs_cache: Optional[dict] = None
         
         # Validate cloud provider
-        if self.cloud not in ["aws", "gcp"]:
-            raise ValueError(f"Unsupported cloud provider: {cloud}. Supported: aws, gcp")
-        
+        if self.cloud not in self.SUPPORTED_CLOUDS:
+            raise ValueError(
+                f"Unsupported cloud provider: {cloud}. "
+                f"Supported: {', '.join(sorted(self.SUPPORTED_CLOUDS))}"
+            )
+
         # Validate environment
-        if self.environment not in ["dev", "staging", "prod"]:
-            raise ValueError(f"Unsupported environment: {environment}. Supported: dev, staging, prod")
-    
-    def check_prerequisites(self):
-        """Check if required tools are installed"""
-        required_tools = {
-            "terraform": "terraform version",
-            "python": "python --version"
+        if self.environment not in self.SUPPORTED_ENVS:
+            raise ValueError(
+                f"Unsupported environment: {environment}. "
+                f"Supported: {', '.join(sorted(self.SUPPORTED_ENVS))}"
+            )
+
+        # Subprocess environments, built once instead of copying the whole
+        # of os.environ on every plan/apply/ansible call
+        self._tf_env = {
+            **os.environ,
+            "TF_VAR_environment": self.environment,
+            "TF_VAR_enable_db": str(self.enable_db).lower(),
         }
-        
-        # Check Ansible - try ansible first, then ansible-playbook as fallback
-        # On Windows, use where.exe to check if command exists
-        ansible_available = False
-        if platform.system() == "Windows":
-            try:
-                result = subprocess.run(["where.exe", "ansible"], 
-                                     capture_output=True, 
-                                     check=False)
-                if result.returncode == 0:
-                    ansible_available = True
-                else:
-                    # Try ansible-playbook
-                    result = subprocess.run(["where.exe", "ansible-playbook"], 
-                                         capture_output=True, 
-                                         check=False)
-                    ansible_available = (result.returncode == 0)
-            except FileNotFoundError:
-                pass
-        else:
-            try:
-                subprocess.run(["ansible", "--version"], 
-                             capture_output=True, 
-                             check=True)
-                ansible_available = True
-            except (subprocess.CalledProcessError, FileNotFoundError):
-                try:
-                    subprocess.run(["ansible-playbook", "--version"], 
-                                 capture_output=True, 
-                                 check=True)
-                    ansible_available = True
-                except (subprocess.CalledProcessError, FileNotFoundError):
-                    pass
-        
-        missing_tools = []
-        for tool, check_cmd in required_tools.items():
-            try:
-                subprocess.run(check_cmd.split(), 
-                             capture_output=True, 
-                             check=True)
-            except (subprocess.CalledProcessError, FileNotFoundError):
-                missing_tools.append(tool)
-        
-        if not ansible_available:
+        self._ansible_env = {
+            **os.environ,
+            "ANSIBLE_HOST_KEY_CHECKING": "False",
+            # SSH pipelining + connection multiplexing amortize connection
+            # setup across the fleet; the fork count is set per run
+            "ANSIBLE_SSH_PIPELINING": "True",
+            "ANSIBLE_SSH_ARGS": (
+                "-o ControlMaster=auto -o ControlPersist=60s "
+                "-o ControlPath=/tmp/ansible-%r@%h:%p"
+            ),
+        }
+    
+    async def check_prerequisites(self):
+        """Check if required tools are installed
+
+        A PATH lookup via shutil.which answers "does the binary exist" in
+        about a millisecond, versus 50-200 ms to fork+exec each tool just
+        to watch it start (ansible --version imports the whole Ansible
+        stack). Version strings, when needed, can be probed on demand.
+        """
+        missing_tools = [
+            tool for tool in ("terraform", "python")
+            if shutil.which(tool) is None
+        ]
+        # Ansible: accept ansible-playbook as a fallback
+        if shutil.which("ansible") is None and shutil.which("ansible-playbook") is None:
             missing_tools.append("ansible")
-        
+
         if missing_tools:
             print(f"❌ Missing required tools: {', '.join(missing_tools)}")
             print("Please install them using: python setup.py install-deps")
             sys.exit(1)
-        
+
         print("✅ All prerequisites met")
     
-    def initialize_terraform(self):
-        """Initialize Terraform in the cloud-specific directory"""
+    async def _run_streaming(self, argv, env=None, cwd=None) -> int:
+        """Run a command, echoing its output live, and return its exit code
+
+        create_subprocess_exec keeps the event loop free while the
+        (potentially multi-minute) Terraform/Ansible process runs, and
+        streaming stdout line-by-line gives the user live progress
+        instead of a frozen terminal. cwd= is passed per subprocess so
+        concurrent tasks never race on the process-global CWD.
+        """
+        proc = await asyncio.create_subprocess_exec(
+            *argv,
+            env=env,
+            cwd=str(cwd) if cwd is not None else None,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT
+        )
+        async for line in proc.stdout:
+            sys.stdout.write(line.decode(errors="replace"))
+        return await proc.wait()
+
+    def _init_fingerprint(self) -> str:
+        """Hash of the terraform config and lockfile that gates re-init"""
+        digest = hashlib.sha256()
+        for tf_file in sorted(self.terraform_dir.glob("*.tf")):
+            digest.update(tf_file.read_bytes())
+        lockfile = self.terraform_dir / ".terraform.lock.hcl"
+        if lockfile.exists():
+            digest.update(lockfile.read_bytes())
+        return digest.hexdigest()
+
+    async def initialize_terraform(self):
+        """Initialize Terraform in the cloud-specific directory
+
+        terraform init re-contacts the registry and re-verifies provider
+        hashes even when nothing changed, often 5-30 s. A fingerprint of
+        the config + lockfile stored alongside the provider cache lets
+        repeat runs skip the subprocess entirely.
+        """
         print(f"\n🔧 Initializing Terraform for {self.cloud.upper()}...")
-        os.chdir(self.terraform_dir)
-        
+
+        fingerprint_file = self.terraform_dir / ".terraform" / ".init_fingerprint"
         try:
-            subprocess.run(["terraform", "init"], check=True)
+            fingerprint = self._init_fingerprint()
+        except OSError:
+            fingerprint = None
+
+        if fingerprint is not None and (self.terraform_dir / ".terraform" / "providers").exists():
+            try:
+                if fingerprint_file.read_text() == fingerprint:
+                    print("✅ Terraform already initialized (init cache hit)")
+                    return
+            except OSError:
+                pass
+
+        returncode = await self._run_streaming(
+            ["terraform", "init", "-input=false", "-upgrade=false"],
+            cwd=self.terraform_dir
+        )
+        if returncode == 0:
+            if fingerprint is not None:
+                try:
+                    fingerprint_file.write_text(fingerprint)
+                except OSError:
+                    pass
             print("✅ Terraform initialized successfully")
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Terraform initialization failed: {e}")
+        else:
+            print(f"❌ Terraform initialization failed (exit code {returncode})")
             sys.exit(1)
-    
-    def plan_terraform(self):
+
+    async def _run_tf(self, args, label: str) -> bool:
+        """Run a terraform subcommand with the shared env/cwd, report status"""
+        returncode = await self._run_streaming(
+            ["terraform", *args],
+            env=self._tf_env,
+            cwd=self.terraform_dir
+        )
+        if returncode == 0:
+            print(f"✅ {label} completed successfully")
+            return True
+        print(f"❌ {label} failed (exit code {returncode})")
+        return False
+
+    async def plan_terraform(self):
         """Run Terraform plan"""
         print(f"\n📋 Running Terraform plan for {self.cloud.upper()}...")
-        
-        # Set environment variables
-        env = os.environ.copy()
-        env["TF_VAR_environment"] = self.environment
-        env["TF_VAR_enable_db"] = str(self.enable_db).lower()
-        
-        try:
-            result = subprocess.run(
-                ["terraform", "plan", "-out=tfplan"],
-                env=env,
-                check=True
-            )
-            print("✅ Terraform plan completed successfully")
-            return True
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Terraform plan failed: {e}")
-            return False
-    
-    def apply_terraform(self):
+
+        args = ["plan", "-out=tfplan"]
+        if self.skip_refresh:
+            # Refresh dominates plan time on large states and is usually
+            # redundant right after an apply
+            args.append("-refresh=false")
+
+        return await self._run_tf(args, "Terraform plan")
+
+    async def apply_terraform(self):
         """Apply Terraform configuration"""
         print(f"\n🚀 Applying Terraform configuration for {self.cloud.upper()}...")
-        
-        env = os.environ.copy()
-        env["TF_VAR_environment"] = self.environment
-        env["TF_VAR_enable_db"] = str(self.enable_db).lower()
-        
-        try:
-            subprocess.run(
-                ["terraform", "apply", "-auto-approve", "tfplan"],
-                env=env,
-                check=True
-            )
-            print("✅ Terraform apply completed successfully")
-            return True
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Terraform apply failed: {e}")
-            return False
+
+        success = await self._run_tf(
+            ["apply", "-auto-approve", f"-parallelism={self.parallelism}", "tfplan"],
+            "Terraform apply"
+        )
+        if success:
+            # The apply changed the state, so any cached outputs are stale
+            self._outputs_cache = None
+        return success
     
     def get_terraform_outputs(self) -> dict:
-        """Get Terraform outputs as JSON"""
+        """Get Terraform outputs as JSON (cached per apply)
+
+        When ijson is installed the output is parsed incrementally off the
+        subprocess pipe, so large states never materialize as one big
+        Python string before decoding; otherwise json.loads on the
+        captured stdout is the fallback.
+        """
+        if self._outputs_cache is not None:
+            return self._outputs_cache
+
+        import json
+
+        try:
+            import ijson
+        except ImportError:
+            ijson = None
+
+        if ijson is not None:
+            try:
+                proc = subprocess.Popen(
+                    ["terraform", "output", "-json"],
+                    cwd=str(self.terraform_dir),
+                    stdout=subprocess.PIPE
+                )
+                outputs = dict(ijson.kvitems(proc.stdout, ""))
+                if proc.wait() != 0:
+                    return {}
+                self._outputs_cache = outputs
+                return outputs
+            except Exception:
+                return {}
+
         try:
             result = subprocess.run(
                 ["terraform", "output", "-json"],
+                cwd=str(self.terraform_dir),
                 capture_output=True,
                 text=True,
                 check=True
             )
-            return json.loads(result.stdout)
+            self._outputs_cache = json.loads(result.stdout)
+            return self._outputs_cache
         except (subprocess.CalledProcessError, json.JSONDecodeError):
             return {}
     
-    def run_ansible(self):
+    async def run_ansible(self):
         """Run Ansible playbooks for application deployment"""
         print(f"\n📦 Running Ansible playbooks...")
-        
-        os.chdir(self.ansible_dir)
-        
+
+        import json
+
         # Get Terraform outputs to pass to Ansible
         outputs = self.get_terraform_outputs()
-        
-        # Create inventory file dynamically
-        inventory_file = self.ansible_dir / "inventory" / f"{self.cloud}-{self.environment}.ini"
-        inventory_file.parent.mkdir(exist_ok=True)
-        
+
         # Extract instance IPs from Terraform outputs
+        output_key = self._OUTPUT_KEY[self.cloud]
         instance_ips = []
-        if self.cloud == "aws":
-            # Assuming output name is instance_public_ips
-            if "instance_public_ips" in outputs:
-                instance_ips = outputs["instance_public_ips"]["value"]
-        elif self.cloud == "gcp":
-            if "instance_ips" in outputs:
-                instance_ips = outputs["instance_ips"]["value"]
-        
-        # Create inventory content
-        inventory_content = f"[{self.cloud}_instances]\n"
-        for idx, ip in enumerate(instance_ips, 1):
-            inventory_content += f"instance{idx} ansible_host={ip} ansible_user=ubuntu\n"
-        
-        inventory_file.write_text(inventory_content)
-        
+        if output_key in outputs:
+            instance_ips = outputs[output_key]["value"]
+
+        # Hand the outputs to the dynamic inventory script via the
+        # environment: no intermediate .ini file is written to disk and
+        # re-parsed by Ansible's INI reader
+        inventory_script = self.ansible_dir / "inventory" / "dynamic.py"
+
         # Run Ansible playbook
         playbook = self.ansible_dir / "playbooks" / "deploy.yml"
-        
-        env = os.environ.copy()
-        env["ANSIBLE_HOST_KEY_CHECKING"] = "False"
-        
-        try:
-            subprocess.run(
-                [
-                    "ansible-playbook",
-                    "-i", str(inventory_file),
-                    str(playbook),
-                    "-e", f"cloud_provider={self.cloud}",
-                    "-e", f"environment={self.environment}"
-                ],
-                env=env,
-                check=True
-            )
+
+        # Enough forks to cover every host (capped at 50) so task execution
+        # batches across the fleet
+        env = self._ansible_env
+        forks = max(5, min(len(instance_ips), 50))
+        env["ANSIBLE_FORKS"] = str(forks)
+        env["TF_OUTPUTS_JSON"] = json.dumps(outputs)
+        env["CLOUD_PROVIDER"] = self.cloud
+
+        returncode = await self._run_streaming(
+            [
+                "ansible-playbook",
+                "-i", str(inventory_script),
+                "-f", str(forks),
+                str(playbook),
+                "-e", f"cloud_provider={self.cloud}",
+                "-e", f"environment={self.environment}"
+            ],
+            env=env,
+            cwd=self.ansible_dir
+        )
+        if returncode == 0:
             print("✅ Ansible deployment completed successfully")
             return True
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Ansible deployment failed: {e}")
-            return False
+        print(f"❌ Ansible deployment failed (exit code {returncode})")
+        return False
     
     def estimate_costs(self):
         """Estimate infrastructure costs"""
-        if CostEstimator is None:
+        try:
+            from modules.cost_estimator import CostEstimator
+        except ImportError:
             print("⚠️  Cost estimator module not available, skipping cost estimation")
             return
-        
+
         print(f"\n💰 Estimating infrastructure costs for {self.cloud.upper()}...")
         
         try:
@@ -246,7 +332,7 @@ class Provisioner:
             print(f"⚠️  Cost estimation failed: {e}")
             print("Continuing with provisioning...")
     
-    def provision(self):
+    async def provision(self, skip_costs: bool = False):
         """Main provisioning workflow"""
         print(f"\n{'='*60}")
         print(f"🚀 Starting Multi-Cloud Provisioning")
@@ -256,24 +342,30 @@ class Provisioner:
         print(f"{'='*60}\n")
         
         # Step 1: Check prerequisites
-        self.check_prerequisites()
-        
-        # Step 2: Estimate costs
-        self.estimate_costs()
-        
-        # Step 3: Initialize Terraform
-        self.initialize_terraform()
+        await self.check_prerequisites()
         
+        # Steps 2+3: cost estimation and terraform init are independent --
+        # the estimate is local arithmetic while init downloads providers --
+        # so overlap them and wait for max(cost, init) instead of the sum.
+        # estimate_costs tolerates its own failures; init exits the workflow.
+        if skip_costs:
+            await self.initialize_terraform()
+        else:
+            await asyncio.gather(
+                asyncio.to_thread(self.estimate_costs),
+                self.initialize_terraform()
+            )
+
         # Step 4: Plan Terraform
-        if not self.plan_terraform():
+        if not await self.plan_terraform():
             sys.exit(1)
-        
+
         # Step 5: Apply Terraform
-        if not self.apply_terraform():
+        if not await self.apply_terraform():
             sys.exit(1)
-        
+
         # Step 6: Run Ansible
-        if not self.run_ansible():
+        if not await self.run_ansible():
             print("⚠️  Ansible deployment failed, but infrastructure is provisioned")
         
         print(f"\n{'='*60}")
@@ -288,6 +380,31 @@ class Provisioner:
                 print(f"   {key}: {value.get('value', 'N/A')}")
 
 
+def _install_pidfd_watcher():
+    """Use pidfd-based child watching where the platform supports it
+
+    With a pidfd the event loop learns about subprocess exit from a single
+    poll() wake-up instead of SIGCHLD signal dispatch, which matters when
+    a terraform apply runs for many minutes while output streaming keeps
+    the loop busy.
+    """
+    if sys.platform != "linux" or not hasattr(asyncio, "PidfdChildWatcher"):
+        return
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+    except (AttributeError, OSError):
+        return  # pidfd_open needs Linux 5.3+
+    import warnings
+    with warnings.catch_warnings():
+        # set_child_watcher is deprecated in newer Pythons but still the
+        # only way to opt in to the pidfd watcher
+        warnings.simplefilter("ignore", DeprecationWarning)
+        try:
+            asyncio.set_child_watcher(asyncio.PidfdChildWatcher())
+        except (NotImplementedError, RuntimeError):
+            pass
+
+
 def main():
     """Main entry point"""
     parser = argparse.ArgumentParser(
@@ -304,14 +421,14 @@ Examples:
     parser.add_argument(
         "--cloud",
         required=True,
-        choices=["aws", "gcp"],
+        choices=sorted(Provisioner.SUPPORTED_CLOUDS),
         help="Cloud provider (aws or gcp)"
     )
-    
+
     parser.add_argument(
         "--env",
         required=True,
-        choices=["dev", "staging", "prod"],
+        choices=sorted(Provisioner.SUPPORTED_ENVS),
         help="Environment (dev, staging, or prod)"
     )
     
@@ -326,6 +443,19 @@ Examples:
         action="store_true",
         help="Skip cost estimation"
     )
+
+    parser.add_argument(
+        "--parallelism",
+        type=int,
+        default=20,
+        help="Number of concurrent Terraform operations during apply (default: 20)"
+    )
+
+    parser.add_argument(
+        "--skip-refresh",
+        action="store_true",
+        help="Skip state refresh during terraform plan"
+    )
     
     args = parser.parse_args()
     
@@ -333,9 +463,12 @@ Examples:
         provisioner = Provisioner(
             cloud=args.cloud,
             environment=args.env,
-            enable_db=args.enable_db
+            enable_db=args.enable_db,
+            parallelism=args.parallelism,
+            skip_refresh=args.skip_refresh
         )
-        provisioner.provision()
+        _install_pidfd_watcher()
+        asyncio.run(provisioner.provision(skip_costs=args.skip_costs))
     except Exception as e:
         print(f"❌ Error: {e}")
         sys.exit(1)
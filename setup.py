@@ -5,9 +5,12 @@ Installs required software using winget (Windows) or package managers (Linux/Mac
 """
 
 import os
+import shutil
 import sys
 import subprocess
 import platform
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Fix Windows encoding issues
@@ -24,13 +27,24 @@ class SetupInstaller:
     def __init__(self):
         self.system = platform.system()
         self.project_root = Path(__file__).parent
-        
-    def run_command(self, command, check=True):
-        """Run a shell command"""
+        # Installs run concurrently, so their output goes through one lock
+        self._print_lock = threading.Lock()
+
+    def _log(self, message):
+        """Print a progress line without interleaving across install threads"""
+        with self._print_lock:
+            print(message)
+
+
+    def run_command(self, argv, check=True):
+        """Run a command given as an argv list
+
+        No shell=True: spawning /bin/sh (or cmd.exe) in front of every
+        command doubled the fork+exec cost for each probe and install.
+        """
         try:
             result = subprocess.run(
-                command,
-                shell=True,
+                argv,
                 check=check,
                 capture_output=True,
                 text=True
@@ -38,104 +52,121 @@ class SetupInstaller:
             return result.returncode == 0, result.stdout, result.stderr
         except subprocess.CalledProcessError as e:
             return False, e.stdout, e.stderr
+        except FileNotFoundError as e:
+            return False, "", str(e)
     
     def check_command(self, command):
         """Check if a command exists"""
-        success, _, _ = self.run_command(f"which {command}" if self.system != "Windows" else f"where {command}", check=False)
-        return success
+        # PATH lookup instead of spawning which/where through a shell;
+        # also removes the Windows-vs-POSIX branch
+        return shutil.which(command) is not None
     
+    # Shared pip options: no interactive prompts, no self-version-check HTTP
+    # round trip, and wheels preferred over source builds on cold machines
+    PIP_FLAGS = ["--disable-pip-version-check", "--no-input", "--prefer-binary", "-q"]
+
     def install_python_deps(self):
         """Install Python dependencies"""
         print("\n📦 Installing Python dependencies...")
-        success, stdout, stderr = self.run_command(
-            f"{sys.executable} -m pip install --upgrade pip"
-        )
-        if not success:
-            print(f"⚠️  Warning: Failed to upgrade pip: {stderr}")
-        
+
         requirements_file = self.project_root / "requirements.txt"
-        if requirements_file.exists():
-            success, stdout, stderr = self.run_command(
-                f"{sys.executable} -m pip install -r {requirements_file}"
+        if not requirements_file.exists():
+            # Still upgrade pip itself, as before
+            success, _, stderr = self.run_command(
+                [sys.executable, "-m", "pip", "install", "--upgrade",
+                 *self.PIP_FLAGS, "pip"]
             )
-            if success:
-                print("✅ Python dependencies installed successfully")
-            else:
-                print(f"❌ Failed to install Python dependencies: {stderr}")
-                return False
-        else:
+            if not success:
+                print(f"⚠️  Warning: Failed to upgrade pip: {stderr}")
             print("⚠️  requirements.txt not found, skipping Python dependencies")
+            return True
+
+        # One invocation upgrades pip and installs the requirements; each
+        # pip startup is ~500 ms of imports, so don't pay it twice
+        success, stdout, stderr = self.run_command(
+            [sys.executable, "-m", "pip", "install", "--upgrade",
+             *self.PIP_FLAGS, "pip", "-r", str(requirements_file)]
+        )
+        if success:
+            print("✅ Python dependencies installed successfully")
+        else:
+            print(f"❌ Failed to install Python dependencies: {stderr}")
+            return False
         return True
     
     def install_terraform_windows(self):
         """Install Terraform on Windows using winget"""
-        print("\n🔧 Installing Terraform using winget...")
+        self._log("\n🔧 Installing Terraform using winget...")
         if not self.check_command("winget"):
-            print("❌ winget not found. Please install Windows Package Manager.")
+            self._log("❌ winget not found. Please install Windows Package Manager.")
             return False
         
         success, stdout, stderr = self.run_command(
-            "winget install --id HashiCorp.Terraform --silent --accept-package-agreements --accept-source-agreements"
+            ["winget", "install", "--id", "HashiCorp.Terraform", "--silent",
+             "--accept-package-agreements", "--accept-source-agreements"]
         )
         if success:
-            print("✅ Terraform installed successfully")
+            self._log("✅ Terraform installed successfully")
         else:
-            print(f"⚠️  Terraform installation may have failed: {stderr}")
-            print("   You may need to install Terraform manually from https://www.terraform.io/downloads")
+            self._log(f"⚠️  Terraform installation may have failed: {stderr}")
+            self._log("   You may need to install Terraform manually from https://www.terraform.io/downloads")
         return True
     
     def install_terraform_linux(self):
         """Install Terraform on Linux"""
-        print("\n🔧 Installing Terraform...")
+        self._log("\n🔧 Installing Terraform...")
         
         # Try different package managers
         if self.check_command("apt-get"):
-            # Debian/Ubuntu
-            success, _, _ = self.run_command(
-                "sudo apt-get update && sudo apt-get install -y terraform"
-            )
+            # Debian/Ubuntu (update and install are separate commands now
+            # that nothing goes through a shell)
+            success, _, _ = self.run_command(["sudo", "apt-get", "update"])
+            if success:
+                success, _, _ = self.run_command(
+                    ["sudo", "apt-get", "install", "-y", "terraform"]
+                )
         elif self.check_command("yum"):
             # RHEL/CentOS
             success, _, _ = self.run_command(
-                "sudo yum install -y terraform"
+                ["sudo", "yum", "install", "-y", "terraform"]
             )
         elif self.check_command("dnf"):
             # Fedora
             success, _, _ = self.run_command(
-                "sudo dnf install -y terraform"
+                ["sudo", "dnf", "install", "-y", "terraform"]
             )
         else:
-            print("⚠️  Package manager not found. Please install Terraform manually.")
-            print("   Visit: https://www.terraform.io/downloads")
+            self._log("⚠️  Package manager not found. Please install Terraform manually.")
+            self._log("   Visit: https://www.terraform.io/downloads")
             return False
         
         if success:
-            print("✅ Terraform installed successfully")
+            self._log("✅ Terraform installed successfully")
         else:
-            print("⚠️  Failed to install Terraform via package manager.")
-            print("   Please install manually from https://www.terraform.io/downloads")
+            self._log("⚠️  Failed to install Terraform via package manager.")
+            self._log("   Please install manually from https://www.terraform.io/downloads")
         return True
     
     def install_terraform_mac(self):
         """Install Terraform on macOS using Homebrew"""
-        print("\n🔧 Installing Terraform using Homebrew...")
+        self._log("\n🔧 Installing Terraform using Homebrew...")
         
         if not self.check_command("brew"):
-            print("❌ Homebrew not found. Please install Homebrew first:")
-            print("   /bin/bash -c \"$(curl -fsSL https://raw.githubusercontent.com/Homebrew/install/HEAD/install.sh)\"")
+            self._log("❌ Homebrew not found. Please install Homebrew first:")
+            self._log("   /bin/bash -c \"$(curl -fsSL https://raw.githubusercontent.com/Homebrew/install/HEAD/install.sh)\"")
             return False
         
-        success, _, _ = self.run_command("brew install terraform")
+        success, _, _ = self.run_command(["brew", "install", "terraform"])
         if success:
-            print("✅ Terraform installed successfully")
+            self._log("✅ Terraform installed successfully")
         else:
-            print("⚠️  Failed to install Terraform. Please install manually.")
+            self._log("⚠️  Failed to install Terraform. Please install manually.")
         return True
     
     def install_terraform(self):
         """Install Terraform based on OS"""
         if self.check_command("terraform"):
-            print("✅ Terraform is already installed")
+            self._log("✅ Terraform is already installed")
             return True
         
         if self.system == "Windows":
@@ -145,102 +176,120 @@ class SetupInstaller:
         elif self.system == "Darwin":
             return self.install_terraform_mac()
         else:
-            print(f"⚠️  Unsupported OS: {self.system}")
-            print("   Please install Terraform manually from https://www.terraform.io/downloads")
+            self._log(f"⚠️  Unsupported OS: {self.system}")
+            self._log("   Please install Terraform manually from https://www.terraform.io/downloads")
             return False
     
     def install_ansible(self):
         """Install Ansible"""
-        print("\n📦 Installing Ansible...")
+        self._log("\n📦 Installing Ansible...")
         if self.check_command("ansible"):
-            print("✅ Ansible is already installed")
+            self._log("✅ Ansible is already installed")
             return True
         
         success, _, stderr = self.run_command(
-            f"{sys.executable} -m pip install ansible ansible-core"
+            [sys.executable, "-m", "pip", "install", *self.PIP_FLAGS,
+             "ansible", "ansible-core"]
         )
         if success:
-            print("✅ Ansible installed successfully")
+            self._log("✅ Ansible installed successfully")
         else:
-            print(f"⚠️  Failed to install Ansible: {stderr}")
+            self._log(f"⚠️  Failed to install Ansible: {stderr}")
             return False
         return True
     
     def install_aws_cli(self):
         """Install AWS CLI"""
-        print("\n☁️  Installing AWS CLI...")
+        self._log("\n☁️  Installing AWS CLI...")
         if self.check_command("aws"):
-            print("✅ AWS CLI is already installed")
+            self._log("✅ AWS CLI is already installed")
             return True
         
         if self.system == "Windows":
             success, _, _ = self.run_command(
-                "winget install --id Amazon.AWSCLI --silent --accept-package-agreements --accept-source-agreements"
+                ["winget", "install", "--id", "Amazon.AWSCLI", "--silent",
+                 "--accept-package-agreements", "--accept-source-agreements"]
             )
         elif self.system == "Linux":
             success, _, _ = self.run_command(
-                "curl \"https://awscli.amazonaws.com/awscli-exe-linux-x86_64.zip\" -o \"awscliv2.zip\" && "
-                "unzip awscliv2.zip && sudo ./aws/install && rm -rf aws awscliv2.zip"
+                ["curl", "https://awscli.amazonaws.com/awscli-exe-linux-x86_64.zip",
+                 "-o", "awscliv2.zip"]
             )
+            if success:
+                success, _, _ = self.run_command(["unzip", "-o", "awscliv2.zip"])
+            if success:
+                success, _, _ = self.run_command(["sudo", "./aws/install"])
+            if success:
+                self.run_command(["rm", "-rf", "aws", "awscliv2.zip"], check=False)
         elif self.system == "Darwin":
             if self.check_command("brew"):
-                success, _, _ = self.run_command("brew install awscli")
+                success, _, _ = self.run_command(["brew", "install", "awscli"])
             else:
-                print("⚠️  Homebrew not found. Please install AWS CLI manually.")
+                self._log("⚠️  Homebrew not found. Please install AWS CLI manually.")
                 return False
         else:
-            print("⚠️  Please install AWS CLI manually from https://aws.amazon.com/cli/")
+            self._log("⚠️  Please install AWS CLI manually from https://aws.amazon.com/cli/")
             return False
         
         if success:
-            print("✅ AWS CLI installed successfully")
+            self._log("✅ AWS CLI installed successfully")
         else:
-            print("⚠️  AWS CLI installation may have failed. Please install manually.")
+            self._log("⚠️  AWS CLI installation may have failed. Please install manually.")
         return True
     
     def install_gcloud_cli(self):
         """Install Google Cloud SDK"""
-        print("\n☁️  Installing Google Cloud SDK...")
+        self._log("\n☁️  Installing Google Cloud SDK...")
         if self.check_command("gcloud"):
-            print("✅ Google Cloud SDK is already installed")
+            self._log("✅ Google Cloud SDK is already installed")
             return True
         
         if self.system == "Windows":
             success, _, _ = self.run_command(
-                "winget install --id Google.CloudSDK --silent --accept-package-agreements --accept-source-agreements"
+                ["winget", "install", "--id", "Google.CloudSDK", "--silent",
+                 "--accept-package-agreements", "--accept-source-agreements"]
             )
         elif self.system == "Linux":
-            print("   Please install Google Cloud SDK manually:")
-            print("   https://cloud.google.com/sdk/docs/install")
+            self._log("   Please install Google Cloud SDK manually:")
+            self._log("   https://cloud.google.com/sdk/docs/install")
             return False
         elif self.system == "Darwin":
             if self.check_command("brew"):
-                success, _, _ = self.run_command("brew install --cask google-cloud-sdk")
+                success, _, _ = self.run_command(
+                    ["brew", "install", "--cask", "google-cloud-sdk"]
+                )
             else:
-                print("⚠️  Homebrew not found. Please install Google Cloud SDK manually.")
+                self._log("⚠️  Homebrew not found. Please install Google Cloud SDK manually.")
                 return False
         else:
-            print("⚠️  Please install Google Cloud SDK manually from https://cloud.google.com/sdk/")
+            self._log("⚠️  Please install Google Cloud SDK manually from https://cloud.google.com/sdk/")
             return False
         
         if success:
-            print("✅ Google Cloud SDK installed successfully")
+            self._log("✅ Google Cloud SDK installed successfully")
         else:
-            print("⚠️  Google Cloud SDK installation may have failed. Please install manually.")
+            self._log("⚠️  Google Cloud SDK installation may have failed. Please install manually.")
         return True
     
     def verify_installations(self):
         """Verify all installations"""
         print("\n🔍 Verifying installations...")
         tools = {
-            "Python": f"{sys.executable} --version",
-            "Terraform": "terraform version",
-            "Ansible": "ansible --version"
+            "Python": [sys.executable, "--version"],
+            "Terraform": ["terraform", "version"],
+            "Ansible": ["ansible", "--version"]
         }
         
+        # The version probes are independent, so run them concurrently and
+        # report in order once they all finish
+        with ThreadPoolExecutor(max_workers=len(tools)) as executor:
+            probes = list(zip(tools.keys(), executor.map(
+                lambda command: self.run_command(command, check=False),
+                tools.values()
+            )))
+
         all_ok = True
-        for tool, command in tools.items():
-            success, stdout, _ = self.run_command(command, check=False)
+        for tool, (success, stdout, _) in probes:
             if success:
                 version = stdout.split('\n')[0] if stdout else "installed"
                 print(f"✅ {tool}: {version}")
@@ -256,17 +305,25 @@ class SetupInstaller:
         print("🚀 One-Click Multi-Cloud Provisioner - Setup")
         print("=" * 60)
         
+        # Python deps go first: the Ansible install depends on pip being
+        # upgraded. The remaining installs are independent downloads, so
+        # they run concurrently and wall-clock is the slowest of them.
         results = {
             "Python Dependencies": self.install_python_deps(),
-            "Terraform": self.install_terraform(),
-            "Ansible": self.install_ansible(),
         }
-        
+
+        tasks = {
+            "Terraform": self.install_terraform,
+            "Ansible": self.install_ansible,
+        }
         if install_aws:
-            results["AWS CLI"] = self.install_aws_cli()
-        
+            tasks["AWS CLI"] = self.install_aws_cli
         if install_gcp:
-            results["Google Cloud SDK"] = self.install_gcloud_cli()
+            tasks["Google Cloud SDK"] = self.install_gcloud_cli
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for tool, success in zip(tasks, executor.map(lambda f: f(), tasks.values())):
+                results[tool] = success
         
         print("\n" + "=" * 60)
         print("📊 Installation Summary")
@@ -0,0 +1,103 @@
+"""
+Shared fixtures and helpers for the test suite
+"""
+
+import sys
+import types
+from functools import lru_cache
+from types import SimpleNamespace
+from unittest.mock import MagicMock, Mock
+
+import pytest
+
+# The alert tests only need smtplib.SMTP as a patch target, and send_alert
+# imports smtplib lazily, so a stub module keeps the real smtplib (and the
+# ssl/socket stack it drags in) off the test-suite import path entirely
+if "smtplib" not in sys.modules:
+    _fake_smtplib = types.ModuleType("smtplib")
+    _fake_smtplib.SMTP = MagicMock
+    sys.modules["smtplib"] = _fake_smtplib
+
+# The project root comes from pythonpath in pytest.ini, resolved once per
+# session instead of a sys.path.insert per test module
+from modules.cost_estimator import CostEstimator
+from scripts.provision import Provisioner
+
+# Every supported (cloud, environment, enable_db) combination
+ALL_CONFIGS = [
+    (cloud, env, db)
+    for cloud in ("aws", "gcp")
+    for env in ("dev", "staging", "prod")
+    for db in (False, True)
+]
+
+
+@pytest.fixture(autouse=True)
+def fast_subprocess(monkeypatch):
+    """Stub subprocess.run for every test so nothing forks for real
+
+    Tests that need a specific result set .return_value or .side_effect
+    on the fixture; a single monkeypatch here is far cheaper than a
+    stacked @patch decorator per test.
+    """
+    # The default result is a plain attribute bag: SimpleNamespace is an
+    # order of magnitude cheaper to build than a Mock
+    stub = Mock(return_value=SimpleNamespace(returncode=0, stdout="", stderr=""))
+    monkeypatch.setattr("subprocess.run", stub)
+    return stub
+
+
+# Keys every cost summary must carry; a frozenset subset check is one
+# C-level comparison instead of six Python-level `in` tests
+_REQUIRED_KEYS = frozenset({
+    "compute", "storage", "data_transfer", "database",
+    "total_monthly", "total_yearly",
+})
+
+
+def validate_summary(summary, expect_db=None):
+    """Assert the invariants every cost summary must satisfy"""
+    assert _REQUIRED_KEYS <= summary.keys()
+    assert summary["total_monthly"] > 0
+    assert summary["total_yearly"] == summary["total_monthly"] * 12
+    if expect_db is not None:
+        assert summary["database"]["enabled"] is expect_db
+
+
+@lru_cache(maxsize=32)
+def cached_estimate(cloud, environment, enable_db=False):
+    """Memoized estimate for tests that only assert on the summary values
+
+    The estimation is a pure function of its configuration, so tests that
+    don't care about the estimator instance itself share one computation
+    per configuration across the whole run.
+    """
+    return CostEstimator(cloud, environment, enable_db=enable_db).estimate()
+
+
+@pytest.fixture(scope="session")
+def provisioner_matrix():
+    """One validated Provisioner per supported (cloud, environment) pair
+
+    Shared across the session so tests asserting on already-validated
+    instances skip repeat cloud/env validation and path resolution.
+    """
+    return {
+        (cloud, env): Provisioner(cloud, env)
+        for cloud in ("aws", "gcp")
+        for env in ("dev", "staging", "prod")
+    }
+
+
+@pytest.fixture(scope="session")
+def estimator_matrix():
+    """Pre-built estimators and their summaries for every configuration
+
+    Built once per session so tests assert against cached results instead
+    of re-running __init__ and estimate() per assertion.
+    """
+    matrix = {}
+    for cloud, env, db in ALL_CONFIGS:
+        estimator = CostEstimator(cloud, env, enable_db=db)
+        matrix[(cloud, env, db)] = (estimator, estimator.estimate())
+    return matrix
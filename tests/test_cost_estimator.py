@@ -3,14 +3,14 @@ Tests for the CostEstimator class
 """
 
 import pytest
-import sys
-from pathlib import Path
+import re
 from unittest.mock import Mock, patch, MagicMock
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
 from modules.cost_estimator import CostEstimator
+from tests.conftest import validate_summary
+
+# Compiled once per module; pytest.raises accepts precompiled patterns
+_UNSUPPORTED_CLOUD = re.compile(r"Unsupported cloud provider")
 
 
 class TestCostEstimator:
@@ -32,167 +32,109 @@ class TestCostEstimator:
         assert estimator.enable_db is True
         assert estimator.region == "us-west1"
     
-    def test_get_region_aws(self):
-        """Test region selection for AWS"""
-        estimator = CostEstimator("aws", "dev")
-        assert estimator._get_region() == "us-east-1"
-        
-        estimator = CostEstimator("aws", "staging")
-        assert estimator._get_region() == "us-west-2"
-        
-        estimator = CostEstimator("aws", "prod")
-        assert estimator._get_region() == "us-west-2"
-    
-    def test_get_region_gcp(self):
-        """Test region selection for GCP"""
-        estimator = CostEstimator("gcp", "dev")
-        assert estimator._get_region() == "us-east1"
-        
-        estimator = CostEstimator("gcp", "staging")
-        assert estimator._get_region() == "us-west1"
-        
-        estimator = CostEstimator("gcp", "prod")
-        assert estimator._get_region() == "us-west1"
-    
-    def test_get_instance_type_aws(self):
-        """Test instance type selection for AWS"""
-        estimator = CostEstimator("aws", "dev")
-        assert estimator._get_instance_type() == "t3.medium"
-        
-        estimator = CostEstimator("aws", "staging")
-        assert estimator._get_instance_type() == "t3.large"
-        
-        estimator = CostEstimator("aws", "prod")
-        assert estimator._get_instance_type() == "t3.large"
-    
-    def test_get_instance_type_gcp(self):
-        """Test instance type selection for GCP"""
-        estimator = CostEstimator("gcp", "dev")
-        assert estimator._get_instance_type() == "n1-standard-1"
-        
-        estimator = CostEstimator("gcp", "staging")
-        assert estimator._get_instance_type() == "n1-standard-2"
-        
-        estimator = CostEstimator("gcp", "prod")
-        assert estimator._get_instance_type() == "n1-standard-2"
-    
-    def test_get_db_instance_type_aws(self):
-        """Test database instance type selection for AWS"""
-        estimator = CostEstimator("aws", "dev", enable_db=True)
-        assert estimator._get_db_instance_type() == "db.t3.micro"
-        
-        estimator = CostEstimator("aws", "staging", enable_db=True)
-        assert estimator._get_db_instance_type() == "db.t3.small"
-        
-        estimator = CostEstimator("aws", "prod", enable_db=True)
-        assert estimator._get_db_instance_type() == "db.t3.small"
-    
-    def test_get_db_instance_type_gcp(self):
-        """Test database instance type selection for GCP"""
-        estimator = CostEstimator("gcp", "dev", enable_db=True)
-        assert estimator._get_db_instance_type() == "db-f1-micro"
-        
-        estimator = CostEstimator("gcp", "staging", enable_db=True)
-        assert estimator._get_db_instance_type() == "db-g1-small"
-        
-        estimator = CostEstimator("gcp", "prod", enable_db=True)
-        assert estimator._get_db_instance_type() == "db-g1-small"
-    
-    def test_estimate_aws_cost_no_db(self):
+    @pytest.mark.parametrize("cloud,env,region", [
+        ("aws", "dev", "us-east-1"),
+        ("aws", "staging", "us-west-2"),
+        ("aws", "prod", "us-west-2"),
+        ("gcp", "dev", "us-east1"),
+        ("gcp", "staging", "us-west1"),
+        ("gcp", "prod", "us-west1"),
+    ])
+    def test_get_region(self, cloud, env, region):
+        """Test region selection per cloud and environment"""
+        assert CostEstimator(cloud, env).region == region
+
+    @pytest.mark.parametrize("cloud,env,instance_type", [
+        ("aws", "dev", "t3.medium"),
+        ("aws", "staging", "t3.large"),
+        ("aws", "prod", "t3.large"),
+        ("gcp", "dev", "n1-standard-1"),
+        ("gcp", "staging", "n1-standard-2"),
+        ("gcp", "prod", "n1-standard-2"),
+    ])
+    def test_get_instance_type(self, cloud, env, instance_type):
+        """Test instance type selection per cloud and environment"""
+        assert CostEstimator(cloud, env).instance_type == instance_type
+
+    @pytest.mark.parametrize("cloud,env,db_instance_type", [
+        ("aws", "dev", "db.t3.micro"),
+        ("aws", "staging", "db.t3.small"),
+        ("aws", "prod", "db.t3.small"),
+        ("gcp", "dev", "db-f1-micro"),
+        ("gcp", "staging", "db-g1-small"),
+        ("gcp", "prod", "db-g1-small"),
+    ])
+    def test_get_db_instance_type(self, cloud, env, db_instance_type):
+        """Test database instance type selection per cloud and environment"""
+        assert CostEstimator(cloud, env, enable_db=True).db_instance_type == db_instance_type
+    
+    def test_estimate_aws_cost_no_db(self, estimator_matrix):
         """Test AWS cost estimation without database"""
-        estimator = CostEstimator("aws", "dev", enable_db=False)
-        cost_summary = estimator._estimate_aws_cost()
-        
-        assert "compute" in cost_summary
-        assert "storage" in cost_summary
-        assert "data_transfer" in cost_summary
-        assert "database" in cost_summary
-        assert "total_monthly" in cost_summary
-        assert "total_yearly" in cost_summary
-        
-        assert cost_summary["database"]["enabled"] is False
-        assert cost_summary["total_monthly"] > 0
-        assert cost_summary["total_yearly"] == cost_summary["total_monthly"] * 12
-    
-    def test_estimate_aws_cost_with_db(self):
+        _, cost_summary = estimator_matrix[("aws", "dev", False)]
+
+        validate_summary(cost_summary, expect_db=False)
+
+    def test_estimate_aws_cost_with_db(self, estimator_matrix):
         """Test AWS cost estimation with database"""
-        estimator = CostEstimator("aws", "staging", enable_db=True)
-        cost_summary = estimator._estimate_aws_cost()
-        
+        _, cost_summary = estimator_matrix[("aws", "staging", True)]
+
         assert cost_summary["database"]["enabled"] is True
         assert cost_summary["database"]["monthly"] > 0
         assert cost_summary["total_monthly"] > cost_summary["compute"]["monthly"]
-    
-    def test_estimate_gcp_cost_no_db(self):
+
+    def test_estimate_gcp_cost_no_db(self, estimator_matrix):
         """Test GCP cost estimation without database"""
-        estimator = CostEstimator("gcp", "dev", enable_db=False)
-        cost_summary = estimator._estimate_gcp_cost()
-        
-        assert "compute" in cost_summary
-        assert "storage" in cost_summary
-        assert "data_transfer" in cost_summary
-        assert "database" in cost_summary
-        assert "total_monthly" in cost_summary
-        assert "total_yearly" in cost_summary
-        
-        assert cost_summary["database"]["enabled"] is False
-        assert cost_summary["total_monthly"] > 0
-    
-    def test_estimate_gcp_cost_with_db(self):
+        _, cost_summary = estimator_matrix[("gcp", "dev", False)]
+
+        validate_summary(cost_summary, expect_db=False)
+
+    def test_estimate_gcp_cost_with_db(self, estimator_matrix):
         """Test GCP cost estimation with database"""
-        estimator = CostEstimator("gcp", "prod", enable_db=True)
-        cost_summary = estimator._estimate_gcp_cost()
-        
+        _, cost_summary = estimator_matrix[("gcp", "prod", True)]
+
         assert cost_summary["database"]["enabled"] is True
         assert cost_summary["database"]["monthly"] > 0
-    
-    def test_estimate_aws(self):
+
+    def test_estimate_aws(self, estimator_matrix):
         """Test AWS cost estimation entry point"""
-        estimator = CostEstimator("aws", "dev")
-        cost_summary = estimator.estimate()
-        
+        _, cost_summary = estimator_matrix[("aws", "dev", False)]
+
         assert isinstance(cost_summary, dict)
-        assert "total_monthly" in cost_summary
-        assert cost_summary["total_monthly"] > 0
-    
-    def test_estimate_gcp(self):
+        validate_summary(cost_summary)
+
+    def test_estimate_gcp(self, estimator_matrix):
         """Test GCP cost estimation entry point"""
-        estimator = CostEstimator("gcp", "staging")
-        cost_summary = estimator.estimate()
-        
+        _, cost_summary = estimator_matrix[("gcp", "staging", False)]
+
         assert isinstance(cost_summary, dict)
-        assert "total_monthly" in cost_summary
-        assert cost_summary["total_monthly"] > 0
-    
+        validate_summary(cost_summary)
+
     def test_estimate_invalid_cloud(self):
         """Test cost estimation with invalid cloud provider"""
         estimator = CostEstimator("aws", "dev")
         estimator.cloud = "invalid"
-        
-        with pytest.raises(ValueError, match="Unsupported cloud provider"):
+
+        with pytest.raises(ValueError, match=_UNSUPPORTED_CLOUD):
             estimator.estimate()
-    
-    def test_prod_environment_multiple_instances(self):
+
+    def test_prod_environment_multiple_instances(self, estimator_matrix):
         """Test that production environment uses multiple instances"""
-        estimator = CostEstimator("aws", "prod", enable_db=False)
-        cost_summary = estimator._estimate_aws_cost()
-        
+        _, cost_summary = estimator_matrix[("aws", "prod", False)]
+
         assert cost_summary["compute"]["instances"] == 2
-    
-    def test_non_prod_environment_single_instance(self):
+
+    def test_non_prod_environment_single_instance(self, estimator_matrix):
         """Test that non-production environments use single instance"""
-        estimator = CostEstimator("aws", "dev", enable_db=False)
-        cost_summary = estimator._estimate_aws_cost()
-        
+        _, cost_summary = estimator_matrix[("aws", "dev", False)]
+
         assert cost_summary["compute"]["instances"] == 1
-    
+
     @patch('builtins.print')
-    def test_print_summary(self, mock_print):
+    def test_print_summary(self, mock_print, estimator_matrix):
         """Test cost summary printing"""
-        estimator = CostEstimator("aws", "dev", enable_db=True)
-        cost_summary = estimator.estimate()
+        estimator, cost_summary = estimator_matrix[("aws", "dev", True)]
         estimator.print_summary(cost_summary)
-        
+
         # Verify print was called (summary should be printed)
         assert mock_print.called
 
@@ -3,16 +3,74 @@ Tests for the DriftDetector class
 """
 
 import pytest
-import sys
+import re
 from pathlib import Path
-from unittest.mock import Mock, patch, MagicMock
-import subprocess
-
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
+from types import SimpleNamespace
+from unittest.mock import patch
 
 from scripts.drift_detector import DriftDetector
 
+# Compiled once per module; pytest.raises accepts precompiled patterns
+_TF_DIR_NOT_FOUND = re.compile(r"Terraform directory not found")
+
+
+# Shared plan snippets: module-level constants are allocated once instead of
+# a fresh multiline literal per test invocation
+PLAN_ADD = (
+    "Plan: 1 to add, 0 to change, 0 to destroy\n"
+    "+ aws_instance.example will be created\n"
+)
+PLAN_MODIFY = (
+    "Plan: 0 to add, 1 to change, 0 to destroy\n"
+    "~ aws_instance.example will be updated\n"
+)
+PLAN_DESTROY = (
+    "Plan: 0 to add, 0 to change, 1 to destroy\n"
+    "- aws_instance.example will be destroyed\n"
+)
+
+
+class FakeSMTP:
+    """Slot-based SMTP stand-in: no MagicMock child allocated per call"""
+
+    __slots__ = ("starttls_called", "login_called", "send_called", "quit_called")
+
+    last_instance = None
+
+    def __init__(self, *args, **kwargs):
+        self.starttls_called = False
+        self.login_called = False
+        self.send_called = False
+        self.quit_called = False
+        FakeSMTP.last_instance = self
+
+    def starttls(self):
+        self.starttls_called = True
+
+    def login(self, *args):
+        self.login_called = True
+
+    def send_message(self, *args):
+        self.send_called = True
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture(scope="module")
+def aws_detector():
+    """One DriftDetector shared per module; __init__ stats the terraform dir"""
+    return DriftDetector("aws")
+
+
+def fake_plan_proc(returncode=0, lines=()):
+    """Attribute-bag stand-in for the terraform plan Popen handle"""
+    return SimpleNamespace(
+        stdout=iter(lines),
+        wait=lambda timeout=None: returncode,
+        kill=lambda: None
+    )
+
 
 class TestDriftDetector:
     """Test cases for DriftDetector class"""
@@ -21,13 +79,15 @@ class TestDriftDetector:
         """Test DriftDetector initialization for AWS"""
         detector = DriftDetector("aws")
         assert detector.cloud == "aws"
-        assert "terraform" in str(detector.terraform_dir) and "aws" in str(detector.terraform_dir)
-    
+        terraform_dir = str(detector.terraform_dir)
+        assert "terraform" in terraform_dir and "aws" in terraform_dir
+
     def test_drift_detector_init_gcp(self):
         """Test DriftDetector initialization for GCP"""
         detector = DriftDetector("gcp")
         assert detector.cloud == "gcp"
-        assert "terraform" in str(detector.terraform_dir) and "gcp" in str(detector.terraform_dir)
+        terraform_dir = str(detector.terraform_dir)
+        assert "terraform" in terraform_dir and "gcp" in terraform_dir
     
     @patch('pathlib.Path.exists')
     def test_drift_detector_init_custom_dir(self, mock_exists):
@@ -37,121 +97,102 @@ class TestDriftDetector:
         detector = DriftDetector("aws", terraform_dir=custom_dir)
         assert detector.terraform_dir == custom_dir
     
-    def test_drift_detector_init_invalid_dir(self):
+    def test_drift_detector_init_invalid_dir(self, monkeypatch):
         """Test DriftDetector initialization with non-existent directory"""
-        invalid_dir = Path("/nonexistent/path")
-        with pytest.raises(ValueError, match="Terraform directory not found"):
-            DriftDetector("aws", terraform_dir=invalid_dir)
+        # Patch exists() so the test never stat()s the host filesystem
+        # (and stays correct even if someone creates the path)
+        monkeypatch.setattr(Path, "exists", lambda self: False)
+        with pytest.raises(ValueError, match=_TF_DIR_NOT_FOUND):
+            DriftDetector("aws", terraform_dir=Path("/nonexistent/path"))
     
-    @patch('subprocess.run')
-    @patch('os.chdir')
-    def test_run_terraform_plan_no_drift(self, mock_chdir, mock_run):
+    @patch('subprocess.Popen')
+    def test_run_terraform_plan_no_drift(self, mock_popen):
         """Test terraform plan when no drift is detected"""
-        mock_run.return_value = Mock(returncode=0, stdout="No changes")
-        
+        mock_popen.return_value = fake_plan_proc(returncode=0, lines=["No changes\n"])
+
         detector = DriftDetector("aws")
         has_drift, output = detector.run_terraform_plan()
-        
+
         assert has_drift is False
         assert "No drift detected" in output
-    
-    @patch('subprocess.run')
-    @patch('os.chdir')
-    def test_run_terraform_plan_drift_detected(self, mock_chdir, mock_run):
+
+    @patch('subprocess.Popen')
+    def test_run_terraform_plan_drift_detected(self, mock_popen, fast_subprocess):
         """Test terraform plan when drift is detected"""
-        mock_run.return_value = Mock(
+        mock_popen.return_value = fake_plan_proc(
             returncode=2,
-            stdout="Plan: 1 to add, 0 to change, 0 to destroy"
+            lines=["Plan: 1 to add, 0 to change, 0 to destroy\n"]
         )
-        
+        # terraform show -json fails, so the plan text is returned as-is
+        fast_subprocess.return_value = SimpleNamespace(
+            returncode=1, stdout="", stderr=""
+        )
+
         detector = DriftDetector("aws")
         has_drift, output = detector.run_terraform_plan()
-        
+
         assert has_drift is True
         assert "Plan:" in output
-    
-    @patch('subprocess.run')
-    @patch('os.chdir')
-    def test_run_terraform_plan_error(self, mock_chdir, mock_run):
+
+    @patch('subprocess.Popen')
+    def test_run_terraform_plan_error(self, mock_popen):
         """Test terraform plan when an error occurs"""
-        mock_run.return_value = Mock(returncode=1, stderr="Error occurred")
-        
+        mock_popen.return_value = fake_plan_proc(returncode=1, lines=["Error occurred\n"])
+
         detector = DriftDetector("aws")
         has_drift, output = detector.run_terraform_plan()
-        
+
         assert has_drift is False
         assert "Error" in output
-    
-    @patch('subprocess.run')
-    @patch('os.chdir')
-    def test_run_terraform_plan_timeout(self, mock_chdir, mock_run):
+
+    @patch('subprocess.Popen')
+    def test_run_terraform_plan_timeout(self, mock_popen, monkeypatch):
         """Test terraform plan timeout handling"""
-        mock_run.side_effect = subprocess.TimeoutExpired("terraform", 600)
-        
+        import threading
+
+        # A terraform that produces output forever but never exits: the
+        # watchdog must kill it (closing the stream) after PLAN_TIMEOUT
+        monkeypatch.setattr(DriftDetector, "PLAN_TIMEOUT", 0.01)
+        killed = threading.Event()
+
+        def endless_stdout():
+            while not killed.wait(0.005):
+                yield "still planning...\n"
+
+        proc = fake_plan_proc(returncode=-9, lines=())
+        proc.stdout = endless_stdout()
+        proc.kill = killed.set
+        mock_popen.return_value = proc
+
         detector = DriftDetector("aws")
         has_drift, output = detector.run_terraform_plan()
-        
+
         assert has_drift is False
         assert "timed out" in output
     
-    def test_parse_drift_changes_add(self):
-        """Test parsing drift changes for resources to add"""
-        plan_output = """
-        Plan: 1 to add, 0 to change, 0 to destroy
-        
-        + aws_instance.example will be created
-        """
-        
-        detector = DriftDetector("aws")
-        drift_summary = detector.parse_drift_changes(plan_output)
-        
-        assert len(drift_summary["resources_to_add"]) > 0
-    
-    def test_parse_drift_changes_modify(self):
-        """Test parsing drift changes for resources to modify"""
-        plan_output = """
-        Plan: 0 to add, 1 to change, 0 to destroy
-        
-        ~ aws_instance.example will be updated
-        """
-        
-        detector = DriftDetector("aws")
-        drift_summary = detector.parse_drift_changes(plan_output)
-        
-        assert len(drift_summary["resources_to_change"]) > 0
-    
-    def test_parse_drift_changes_destroy(self):
-        """Test parsing drift changes for resources to destroy"""
-        plan_output = """
-        Plan: 0 to add, 0 to change, 1 to destroy
-        
-        - aws_instance.example will be destroyed
-        """
-        
-        detector = DriftDetector("aws")
-        drift_summary = detector.parse_drift_changes(plan_output)
-        
-        assert len(drift_summary["resources_to_destroy"]) > 0
-    
-    def test_generate_drift_report_no_drift(self):
+    @pytest.mark.parametrize("plan_output,key", [
+        (PLAN_ADD, "resources_to_add"),
+        (PLAN_MODIFY, "resources_to_change"),
+        (PLAN_DESTROY, "resources_to_destroy"),
+    ])
+    def test_parse_drift_changes(self, aws_detector, plan_output, key):
+        """Test parsing drift changes per change category"""
+        drift_summary = aws_detector.parse_drift_changes(plan_output)
+
+        assert len(drift_summary[key]) > 0
+
+    def test_generate_drift_report_no_drift(self, aws_detector):
         """Test drift report generation when no drift is detected"""
-        detector = DriftDetector("aws")
-        report = detector.generate_drift_report(False, "No changes")
-        
+        report = aws_detector.generate_drift_report(False, "No changes")
+
         assert "No drift detected" in report
         assert "Cloud Provider: AWS" in report
         assert "Timestamp:" in report
-    
-    def test_generate_drift_report_with_drift(self):
+
+    def test_generate_drift_report_with_drift(self, aws_detector):
         """Test drift report generation when drift is detected"""
-        plan_output = """
-        Plan: 1 to add, 0 to change, 0 to destroy
-        + aws_instance.example will be created
-        """
-        
-        detector = DriftDetector("aws")
-        report = detector.generate_drift_report(True, plan_output)
-        
+        report = aws_detector.generate_drift_report(True, PLAN_ADD)
+
         assert "DRIFT DETECTED" in report
         assert "Resources to be added" in report
     
@@ -166,8 +207,7 @@ class TestDriftDetector:
         mock_mkdir.assert_called()
         mock_write.assert_called_with(report)
     
-    @patch('smtplib.SMTP')
-    def test_send_alert_success(self, mock_smtp):
+    def test_send_alert_success(self, monkeypatch):
         """Test sending drift alert email successfully"""
         email_config = {
             "from": "test@example.com",
@@ -177,18 +217,18 @@ class TestDriftDetector:
             "username": "user",
             "password": "pass"
         }
-        
-        mock_server = MagicMock()
-        mock_smtp.return_value = mock_server
-        
+
+        monkeypatch.setattr("smtplib.SMTP", FakeSMTP)
+
         detector = DriftDetector("aws")
         detector.send_alert("Test report", email_config)
-        
-        mock_smtp.assert_called()
-        mock_server.starttls.assert_called()
-        mock_server.login.assert_called()
-        mock_server.send_message.assert_called()
-        mock_server.quit.assert_called()
+
+        server = FakeSMTP.last_instance
+        assert server is not None
+        assert server.starttls_called
+        assert server.login_called
+        assert server.send_called
+        assert server.quit_called
     
     @patch('smtplib.SMTP')
     def test_send_alert_failure(self, mock_smtp):
@@ -205,28 +245,30 @@ class TestDriftDetector:
         detector.send_alert("Test report", email_config)
     
     @patch.object(DriftDetector, 'run_terraform_plan')
-    @patch.object(DriftDetector, 'save_report')
+    @patch('pathlib.Path.open')
+    @patch('pathlib.Path.mkdir')
     @patch('builtins.print')
-    def test_detect_drift_no_drift(self, mock_print, mock_save, mock_plan):
+    def test_detect_drift_no_drift(self, mock_print, mock_mkdir, mock_open, mock_plan):
         """Test drift detection when no drift is found"""
         mock_plan.return_value = (False, "No changes")
-        
+
         detector = DriftDetector("aws")
         has_drift = detector.detect_drift(alert_on_drift=False)
-        
+
         assert has_drift is False
-        mock_save.assert_called()
-    
+        mock_open.assert_called()  # Report should be streamed to file
+
     @patch.object(DriftDetector, 'run_terraform_plan')
-    @patch.object(DriftDetector, 'save_report')
+    @patch('pathlib.Path.open')
+    @patch('pathlib.Path.mkdir')
     @patch('builtins.print')
-    def test_detect_drift_with_drift(self, mock_print, mock_save, mock_plan):
+    def test_detect_drift_with_drift(self, mock_print, mock_mkdir, mock_open, mock_plan):
         """Test drift detection when drift is found"""
         mock_plan.return_value = (True, "Changes detected")
-        
+
         detector = DriftDetector("aws")
         has_drift = detector.detect_drift(alert_on_drift=False)
-        
+
         assert has_drift is True
-        mock_save.assert_called()
+        mock_open.assert_called()  # Report should be streamed to file
 
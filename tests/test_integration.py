@@ -3,28 +3,19 @@ Integration tests for the provisioner
 """
 
 import pytest
-import sys
-from pathlib import Path
-from unittest.mock import Mock, patch, MagicMock
-
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
+from unittest.mock import patch, MagicMock
 
 from scripts.provision import Provisioner
-from modules.cost_estimator import CostEstimator
 from scripts.drift_detector import DriftDetector
+from tests.conftest import cached_estimate, validate_summary
 
 
 class TestIntegration:
     """Integration tests"""
     
-    @patch('subprocess.run')
-    @patch('os.chdir')
-    def test_provisioner_with_cost_estimation(self, mock_chdir, mock_run):
+    def test_provisioner_with_cost_estimation(self, provisioner_matrix):
         """Test that provisioner integrates with cost estimator"""
-        mock_run.return_value = Mock(returncode=0)
-        
-        provisioner = Provisioner("aws", "dev", enable_db=False)
+        provisioner = provisioner_matrix[("aws", "dev")]
         
         # Mock cost estimator
         with patch('modules.cost_estimator.CostEstimator') as mock_estimator_class:
@@ -41,59 +32,45 @@ class TestIntegration:
             except Exception as e:
                 pytest.fail(f"estimate_costs() raised {e}")
     
-    def test_cost_estimator_all_environments(self):
-        """Test cost estimation for all supported environments"""
-        environments = ["dev", "staging", "prod"]
-        clouds = ["aws", "gcp"]
-        
-        for cloud in clouds:
-            for env in environments:
-                estimator = CostEstimator(cloud, env, enable_db=False)
-                cost_summary = estimator.estimate()
-                
-                assert cost_summary["total_monthly"] > 0
-                assert cost_summary["total_yearly"] == cost_summary["total_monthly"] * 12
-    
-    def test_cost_estimator_with_and_without_db(self):
-        """Test cost estimation with and without database"""
-        estimator_no_db = CostEstimator("aws", "staging", enable_db=False)
-        estimator_with_db = CostEstimator("aws", "staging", enable_db=True)
-        
-        cost_no_db = estimator_no_db.estimate()
-        cost_with_db = estimator_with_db.estimate()
-        
-        # Cost with DB should be higher
-        assert cost_with_db["total_monthly"] > cost_no_db["total_monthly"]
-        assert cost_with_db["database"]["enabled"] is True
-        assert cost_no_db["database"]["enabled"] is False
+    @pytest.mark.parametrize("cloud,env,db", [
+        (cloud, env, db)
+        for cloud in ("aws", "gcp")
+        for env in ("dev", "staging", "prod")
+        for db in (False, True)
+    ])
+    def test_estimate_matrix(self, cloud, env, db):
+        """Test estimate invariants across every cloud/env/db combination"""
+        cost_summary = cached_estimate(cloud, env, enable_db=db)
+
+        validate_summary(cost_summary, expect_db=db)
+        if db:
+            # Enabling the database should always cost more
+            cost_no_db = cached_estimate(cloud, env, enable_db=False)
+            assert cost_summary["total_monthly"] > cost_no_db["total_monthly"]
     
-    def test_provisioner_validation_flow(self):
-        """Test the complete validation flow of provisioner"""
-        # Valid combinations
-        valid_combinations = [
-            ("aws", "dev"),
-            ("aws", "staging"),
-            ("aws", "prod"),
-            ("gcp", "dev"),
-            ("gcp", "staging"),
-            ("gcp", "prod"),
-        ]
-        
-        for cloud, env in valid_combinations:
-            provisioner = Provisioner(cloud, env)
-            assert provisioner.cloud == cloud.lower()
-            assert provisioner.environment == env.lower()
-        
-        # Invalid combinations
-        invalid_combinations = [
-            ("azure", "dev"),
-            ("aws", "invalid"),
-            ("invalid", "prod"),
-        ]
-        
-        for cloud, env in invalid_combinations:
-            with pytest.raises(ValueError):
-                Provisioner(cloud, env)
+    @pytest.mark.parametrize("cloud,env", [
+        ("aws", "dev"),
+        ("aws", "staging"),
+        ("aws", "prod"),
+        ("gcp", "dev"),
+        ("gcp", "staging"),
+        ("gcp", "prod"),
+    ])
+    def test_provisioner_valid_combination(self, cloud, env, provisioner_matrix):
+        """Test that every supported cloud/environment pair validates"""
+        provisioner = provisioner_matrix[(cloud, env)]
+        assert provisioner.cloud == cloud.lower()
+        assert provisioner.environment == env.lower()
+
+    @pytest.mark.parametrize("cloud,env", [
+        ("azure", "dev"),
+        ("aws", "invalid"),
+        ("invalid", "prod"),
+    ])
+    def test_provisioner_invalid_combination(self, cloud, env):
+        """Test that unsupported cloud/environment pairs are rejected"""
+        with pytest.raises(ValueError):
+            Provisioner(cloud, env)
     
     @patch('pathlib.Path.exists')
     def test_drift_detector_initialization(self, mock_exists):
@@ -105,6 +82,8 @@ class TestIntegration:
         
         assert detector_aws.cloud == "aws"
         assert detector_gcp.cloud == "gcp"
-        assert "terraform" in str(detector_aws.terraform_dir) and "aws" in str(detector_aws.terraform_dir)
-        assert "terraform" in str(detector_gcp.terraform_dir) and "gcp" in str(detector_gcp.terraform_dir)
+        aws_dir = str(detector_aws.terraform_dir)
+        gcp_dir = str(detector_gcp.terraform_dir)
+        assert "terraform" in aws_dir and "aws" in aws_dir
+        assert "terraform" in gcp_dir and "gcp" in gcp_dir
 
@@ -2,17 +2,43 @@
 Tests for the Provisioner class
 """
 
+import asyncio
 import pytest
-import sys
+import re
 from pathlib import Path
-from unittest.mock import Mock, patch, MagicMock
+from types import SimpleNamespace
+from unittest.mock import patch
 import subprocess
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
 from scripts.provision import Provisioner
 
+# Compiled once per module; pytest.raises accepts precompiled patterns
+_UNSUPPORTED_CLOUD = re.compile(r"Unsupported cloud provider")
+_UNSUPPORTED_ENV = re.compile(r"Unsupported environment")
+
+# Pre-built failure shared across tests instead of re-constructing the
+# exception (and its state capture) inside each test body
+_TF_FAIL = subprocess.CalledProcessError(1, "terraform")
+
+# Canonical terraform output payload shared by the outputs and ansible
+# tests; production reads .stdout as str (text mode), so a str it stays
+_TF_OUTPUT = '{"instance_public_ips": {"value": ["1.2.3.4"]}}'
+
+
+def fake_subprocess_exec(returncode=0, lines=()):
+    """Build an asyncio.create_subprocess_exec stand-in for the given result"""
+    async def spawn(*args, **kwargs):
+        async def stdout_lines():
+            for line in lines:
+                yield line
+
+        async def wait():
+            return returncode
+
+        return SimpleNamespace(stdout=stdout_lines(), wait=wait)
+
+    return spawn
+
 
 class TestProvisioner:
     """Test cases for Provisioner class"""
@@ -23,7 +49,8 @@ class TestProvisioner:
         assert provisioner.cloud == "aws"
         assert provisioner.environment == "dev"
         assert provisioner.enable_db is False
-        assert "terraform" in str(provisioner.terraform_dir) and "aws" in str(provisioner.terraform_dir)
+        terraform_dir = str(provisioner.terraform_dir)
+        assert "terraform" in terraform_dir and "aws" in terraform_dir
     
     def test_provisioner_init_valid_gcp(self):
         """Test Provisioner initialization with valid GCP parameters"""
@@ -31,149 +58,167 @@ class TestProvisioner:
         assert provisioner.cloud == "gcp"
         assert provisioner.environment == "staging"
         assert provisioner.enable_db is True
-        assert "terraform" in str(provisioner.terraform_dir) and "gcp" in str(provisioner.terraform_dir)
+        terraform_dir = str(provisioner.terraform_dir)
+        assert "terraform" in terraform_dir and "gcp" in terraform_dir
     
     def test_provisioner_init_invalid_cloud(self):
         """Test Provisioner initialization with invalid cloud provider"""
-        with pytest.raises(ValueError, match="Unsupported cloud provider"):
+        with pytest.raises(ValueError, match=_UNSUPPORTED_CLOUD):
             Provisioner("azure", "dev")
     
     def test_provisioner_init_invalid_environment(self):
         """Test Provisioner initialization with invalid environment"""
-        with pytest.raises(ValueError, match="Unsupported environment"):
+        with pytest.raises(ValueError, match=_UNSUPPORTED_ENV):
             Provisioner("aws", "invalid")
     
     def test_provisioner_init_case_insensitive(self):
         """Test that cloud and environment are case-insensitive"""
-        provisioner1 = Provisioner("AWS", "DEV")
-        provisioner2 = Provisioner("aws", "dev")
-        assert provisioner1.cloud == provisioner2.cloud
-        assert provisioner1.environment == provisioner2.environment
+        # Assert the normalized values directly rather than comparing
+        # against a second lowercase-constructed instance
+        for cloud_upper, cloud_lower in [("AWS", "aws"), ("GCP", "gcp")]:
+            for env_upper, env_lower in [("DEV", "dev"), ("PROD", "prod")]:
+                provisioner = Provisioner(cloud_upper, env_upper)
+                assert provisioner.cloud == cloud_lower
+                assert provisioner.environment == env_lower
     
-    @patch('subprocess.run')
-    def test_check_prerequisites_all_installed(self, mock_run):
+    @patch('shutil.which')
+    def test_check_prerequisites_all_installed(self, mock_which):
         """Test prerequisite check when all tools are installed"""
-        # Mock successful command execution
-        mock_run.return_value = Mock(returncode=0)
-        
+        # Every tool resolves on PATH
+        mock_which.side_effect = lambda tool: f"/usr/bin/{tool}"
+
         provisioner = Provisioner("aws", "dev")
         # Should not raise exception
         try:
-            provisioner.check_prerequisites()
+            asyncio.run(provisioner.check_prerequisites())
         except SystemExit:
             pytest.fail("check_prerequisites() raised SystemExit unexpectedly")
-    
-    @patch('subprocess.run')
-    def test_check_prerequisites_missing_tool(self, mock_run):
+
+    @patch('shutil.which')
+    def test_check_prerequisites_missing_tool(self, mock_which):
         """Test prerequisite check when a tool is missing"""
-        def side_effect(cmd, **kwargs):
-            if "terraform" in cmd:
-                raise FileNotFoundError()
-            return Mock(returncode=0)
-        
-        mock_run.side_effect = side_effect
-        
+        mock_which.side_effect = (
+            lambda tool: None if tool == "terraform" else f"/usr/bin/{tool}"
+        )
+
         provisioner = Provisioner("aws", "dev")
         with pytest.raises(SystemExit):
-            provisioner.check_prerequisites()
+            asyncio.run(provisioner.check_prerequisites())
     
-    @patch('subprocess.run')
-    @patch('os.chdir')
-    def test_initialize_terraform_success(self, mock_chdir, mock_run):
+    @patch('asyncio.create_subprocess_exec')
+    def test_initialize_terraform_success(self, mock_exec, monkeypatch):
         """Test successful Terraform initialization"""
-        mock_run.return_value = Mock(returncode=0)
-        
+        mock_exec.side_effect = fake_subprocess_exec(returncode=0)
+
+        # Keep the fingerprint cache out of the picture: force a cache
+        # miss and stub the writes so no real repo state is read or
+        # touched regardless of whether .terraform/ exists on disk
+        monkeypatch.setattr(Provisioner, "_init_fingerprint", lambda self: "abc123")
+        monkeypatch.setattr(Path, "exists", lambda self: False)
+        monkeypatch.setattr(Path, "write_text", lambda self, text: None)
+
         provisioner = Provisioner("aws", "dev")
         try:
-            provisioner.initialize_terraform()
+            asyncio.run(provisioner.initialize_terraform())
         except SystemExit:
             pytest.fail("initialize_terraform() raised SystemExit unexpectedly")
-        
-        mock_run.assert_called()
-        assert "terraform" in str(mock_run.call_args[0][0])
-        assert "init" in mock_run.call_args[0][0]
-    
-    @patch('subprocess.run')
-    @patch('os.chdir')
-    def test_plan_terraform_success(self, mock_chdir, mock_run):
+
+        mock_exec.assert_called()
+        assert "terraform" in mock_exec.call_args[0]
+        assert "init" in mock_exec.call_args[0]
+
+    @patch('asyncio.create_subprocess_exec')
+    def test_initialize_terraform_cache_hit(self, mock_exec, monkeypatch):
+        """Test that a matching init fingerprint skips the subprocess"""
+        monkeypatch.setattr(Provisioner, "_init_fingerprint", lambda self: "abc123")
+        monkeypatch.setattr(Path, "exists", lambda self: True)
+        monkeypatch.setattr(Path, "read_text", lambda self: "abc123")
+
+        provisioner = Provisioner("aws", "dev")
+        asyncio.run(provisioner.initialize_terraform())
+
+        mock_exec.assert_not_called()
+
+    @patch('asyncio.create_subprocess_exec')
+    def test_plan_terraform_success(self, mock_exec):
         """Test successful Terraform plan"""
-        mock_run.return_value = Mock(returncode=0)
-        
+        mock_exec.side_effect = fake_subprocess_exec(returncode=0)
+
         provisioner = Provisioner("aws", "dev")
-        result = provisioner.plan_terraform()
-        
+        result = asyncio.run(provisioner.plan_terraform())
+
         assert result is True
-        mock_run.assert_called()
-        assert "plan" in str(mock_run.call_args[0][0])
-    
-    @patch('subprocess.run')
-    @patch('os.chdir')
-    def test_plan_terraform_failure(self, mock_chdir, mock_run):
+        mock_exec.assert_called()
+        assert "plan" in mock_exec.call_args[0]
+
+    @patch('asyncio.create_subprocess_exec')
+    def test_plan_terraform_failure(self, mock_exec):
         """Test Terraform plan failure"""
-        mock_run.side_effect = subprocess.CalledProcessError(1, "terraform")
-        
+        mock_exec.side_effect = fake_subprocess_exec(returncode=1)
+
         provisioner = Provisioner("aws", "dev")
-        result = provisioner.plan_terraform()
-        
+        result = asyncio.run(provisioner.plan_terraform())
+
         assert result is False
-    
-    @patch('subprocess.run')
-    @patch('os.chdir')
-    def test_apply_terraform_success(self, mock_chdir, mock_run):
+
+    @patch('asyncio.create_subprocess_exec')
+    def test_apply_terraform_success(self, mock_exec):
         """Test successful Terraform apply"""
-        mock_run.return_value = Mock(returncode=0)
-        
+        mock_exec.side_effect = fake_subprocess_exec(returncode=0)
+
         provisioner = Provisioner("aws", "dev")
-        result = provisioner.apply_terraform()
-        
+        result = asyncio.run(provisioner.apply_terraform())
+
         assert result is True
-        mock_run.assert_called()
-        assert "apply" in str(mock_run.call_args[0][0])
+        mock_exec.assert_called()
+        assert "apply" in mock_exec.call_args[0]
     
-    @patch('subprocess.run')
-    def test_get_terraform_outputs_success(self, mock_run):
+    def test_get_terraform_outputs_success(self, fast_subprocess):
         """Test getting Terraform outputs successfully"""
-        mock_output = '{"instance_public_ips": {"value": ["1.2.3.4"]}}'
-        mock_run.return_value = Mock(
+        fast_subprocess.return_value = SimpleNamespace(
             returncode=0,
-            stdout=mock_output
+            stdout=_TF_OUTPUT,
+            stderr=""
         )
-        
+
         provisioner = Provisioner("aws", "dev")
         outputs = provisioner.get_terraform_outputs()
-        
+
         assert "instance_public_ips" in outputs
         assert outputs["instance_public_ips"]["value"] == ["1.2.3.4"]
-    
-    @patch('subprocess.run')
-    def test_get_terraform_outputs_failure(self, mock_run):
+
+    def test_get_terraform_outputs_failure(self, fast_subprocess):
         """Test getting Terraform outputs when command fails"""
-        mock_run.side_effect = subprocess.CalledProcessError(1, "terraform")
-        
+        fast_subprocess.side_effect = _TF_FAIL
+
         provisioner = Provisioner("aws", "dev")
         outputs = provisioner.get_terraform_outputs()
-        
+
         assert outputs == {}
     
-    @patch('subprocess.run')
-    @patch('os.chdir')
-    @patch('pathlib.Path.write_text')
-    @patch('pathlib.Path.mkdir')
-    def test_run_ansible_success(self, mock_mkdir, mock_write, mock_chdir, mock_run):
+    def test_run_ansible_success(self, monkeypatch, fast_subprocess):
         """Test successful Ansible execution"""
         # Mock Terraform outputs
-        mock_output = '{"instance_public_ips": {"value": ["1.2.3.4"]}}'
-        
-        def side_effect(cmd, **kwargs):
-            if "output" in cmd:
-                return Mock(returncode=0, stdout=mock_output)
-            return Mock(returncode=0)
-        
-        mock_run.side_effect = side_effect
-        
+        fast_subprocess.return_value = SimpleNamespace(
+            returncode=0, stdout=_TF_OUTPUT, stderr=""
+        )
+
+        # One monkeypatch undo-stack instead of stacked @patch decorators
+        spawn = fake_subprocess_exec(returncode=0)
+        captured = {}
+
+        async def record_spawn(*args, **kwargs):
+            captured["env"] = kwargs.get("env")
+            return await spawn(*args, **kwargs)
+
+        monkeypatch.setattr("asyncio.create_subprocess_exec", record_spawn)
+
         provisioner = Provisioner("aws", "dev")
-        result = provisioner.run_ansible()
-        
+        result = asyncio.run(provisioner.run_ansible())
+
         assert result is True
-        mock_write.assert_called()  # Inventory file should be created
+        # The outputs should reach the dynamic inventory via the environment
+        env = captured["env"]
+        assert "instance_public_ips" in env["TF_OUTPUTS_JSON"]
+        assert env["CLOUD_PROVIDER"] == "aws"
 